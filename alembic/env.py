@@ -4,7 +4,7 @@ Configures the database URL, logging, and imports necessary models for migration
 """
 from alembic import context
 from app.config import logger, DB_URL
-from app.database import Base, User, Category, Cart, CartItem, Product # Unused imports are important for db migrations
+from app.database import Base, User, Category, Cart, CartItem, Product, CatalogVersion, RevokedToken # Unused imports are important for db migrations
 from sqlalchemy import engine_from_config, pool
 from logging.config import fileConfig
 
@@ -0,0 +1,53 @@
+"""catalog versions
+
+Revision ID: 7512f9b26bf6
+Revises: dc338c14cddd
+Create Date: 2026-10-17 19:53:22.815795
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7512f9b26bf6'
+down_revision: Union[str, None] = 'dc338c14cddd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Catalog tables whose writes bump their version
+TABLES = ['products', 'categories']
+
+
+def upgrade() -> None:
+    op.create_table('catalog_versions',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('version', sa.BigInteger(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(sa.table('catalog_versions', sa.column('name', sa.String())), [{'name': table} for table in TABLES])
+    # Statement level triggers, so a bulk write or a cascade delete bumps the version once
+    op.execute("""
+        CREATE FUNCTION bump_catalog_version() RETURNS trigger AS $$
+        BEGIN
+            UPDATE catalog_versions SET version = version + 1, updated_at = NOW() WHERE name = TG_TABLE_NAME;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """)
+    for table in TABLES:
+        op.execute(f"""
+            CREATE TRIGGER {table}_catalog_version AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+            FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()
+        """)
+
+
+def downgrade() -> None:
+    for table in TABLES:
+        op.execute(f"DROP TRIGGER {table}_catalog_version ON {table}")
+    op.execute("DROP FUNCTION bump_catalog_version()")
+    op.drop_table('catalog_versions')
@@ -0,0 +1,42 @@
+"""product search vector
+
+Revision ID: a9f5952f0b58
+Revises: b7d7db2f36d2
+Create Date: 2026-10-17 19:38:41.368856
+
+Adding the stored generated column rewrites the whole products table, computing the vector of every row,
+under an ACCESS EXCLUSIVE lock that blocks reads and writes alike until it is done: on a large catalog,
+run it in a maintenance window. The GIN index is then built concurrently, without blocking writes.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+from sqlalchemy.dialects import postgresql
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a9f5952f0b58'
+down_revision: Union[str, None] = 'b7d7db2f36d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Text search document of a product, kept in sync with `PRODUCT_SEARCH_VECTOR` in the models
+SEARCH_VECTOR = "setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', description), 'B')"
+
+
+def upgrade() -> None:
+    op.add_column('products', sa.Column('search_vector', postgresql.TSVECTOR(),
+                                        sa.Computed(SEARCH_VECTOR, persisted=True), nullable=False))
+    # Built concurrently like the later index migrations, dropping leftovers of an interrupted build first
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_search_vector', table_name='products', postgresql_concurrently=True, if_exists=True)
+        op.create_index('ix_products_search_vector', 'products', ['search_vector'], postgresql_using='gin',
+                        postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_products_search_vector', table_name='products', postgresql_concurrently=True, if_exists=True)
+    op.drop_column('products', 'search_vector')
@@ -0,0 +1,39 @@
+"""id range sequences
+
+Revision ID: b7d7db2f36d2
+Revises: 3a86f60db87e
+Create Date: 2026-10-17 19:30:26.397602
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d7db2f36d2'
+down_revision: Union[str, None] = '3a86f60db87e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Sequence backing the primary key of each table, with the first and last ids of the table's range
+ID_RANGES = {
+    'categories_id_seq': ('categories', 100, 199),
+    'products_id_seq': ('products', 200, 299),
+    'carts_id_seq': ('carts', 300, 399),
+    'users_id_seq': ('users', 500, 599),
+}
+
+
+def upgrade() -> None:
+    # Move each serial sequence to its id range, then past the highest id already allocated in it.
+    # Once a range is used up, inserts fail on `nextval` instead of spilling into the next range.
+    for sequence, (table, start, end) in ID_RANGES.items():
+        op.execute(f"ALTER SEQUENCE {sequence} MINVALUE {start} MAXVALUE {end} START WITH {start} RESTART WITH {start}")
+        op.execute(f"SELECT setval('{sequence}', LEAST(MAX(id), {end})) FROM {table} HAVING MAX(id) >= {start}")
+
+
+def downgrade() -> None:
+    for sequence in ID_RANGES:
+        op.execute(f"ALTER SEQUENCE {sequence} NO MINVALUE NO MAXVALUE START WITH 1")
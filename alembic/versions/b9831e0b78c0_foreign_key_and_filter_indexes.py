@@ -0,0 +1,45 @@
+"""foreign key and filter indexes
+
+Revision ID: b9831e0b78c0
+Revises: a9f5952f0b58
+Create Date: 2026-10-17 19:43:50.786484
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9831e0b78c0'
+down_revision: Union[str, None] = 'a9f5952f0b58'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Indexes on the foreign keys followed by joins and cascade deletes, and on the filtered columns
+INDEXES = {
+    'ix_carts_user_id': ('carts', 'user_id'),
+    'ix_carts_created_at': ('carts', 'created_at'),
+    'ix_cart_items_cart_id': ('cart_items', 'cart_id'),
+    'ix_cart_items_product_id': ('cart_items', 'product_id'),
+    'ix_products_category_id': ('products', 'category_id'),
+    'ix_products_created_at': ('products', 'created_at'),
+    'ix_users_role': ('users', 'role'),
+    'ix_users_created_at': ('users', 'created_at'),
+}
+
+
+def upgrade() -> None:
+    # Built concurrently so writes to a live database are not blocked, which cannot run in a transaction.
+    # A build interrupted midway leaves an invalid index behind, so it is dropped before retrying.
+    with op.get_context().autocommit_block():
+        for index, (table, column) in INDEXES.items():
+            op.drop_index(index, table_name=table, postgresql_concurrently=True, if_exists=True)
+            op.create_index(index, table, [column], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index, (table, column) in INDEXES.items():
+            op.drop_index(index, table_name=table, postgresql_concurrently=True, if_exists=True)
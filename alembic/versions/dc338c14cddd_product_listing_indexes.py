@@ -0,0 +1,49 @@
+"""product listing indexes
+
+Revision ID: dc338c14cddd
+Revises: b9831e0b78c0
+Create Date: 2026-10-17 19:44:51.866098
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dc338c14cddd'
+down_revision: Union[str, None] = 'b9831e0b78c0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Composite indexes matching the sort orders of the product listings, for the whole catalog and within a category
+SORT_COLUMNS = ['price', 'rating', 'created_at', 'discount_percentage']
+INDEXES = {
+    **{f'ix_products_{column}_id': [column, 'id'] for column in SORT_COLUMNS},
+    **{f'ix_products_category_id_{column}_id': ['category_id', column, 'id'] for column in SORT_COLUMNS},
+}
+# Single column indexes that the composite ones start with, and make redundant
+REPLACED_INDEXES = {
+    'ix_products_category_id': ['category_id'],
+    'ix_products_created_at': ['created_at'],
+}
+
+
+def upgrade() -> None:
+    # Built concurrently like the previous index migration, dropping leftovers of an interrupted build first
+    with op.get_context().autocommit_block():
+        for index, columns in INDEXES.items():
+            op.drop_index(index, table_name='products', postgresql_concurrently=True, if_exists=True)
+            op.create_index(index, 'products', columns, postgresql_concurrently=True)
+        for index in REPLACED_INDEXES:
+            op.drop_index(index, table_name='products', postgresql_concurrently=True, if_exists=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index, columns in REPLACED_INDEXES.items():
+            op.drop_index(index, table_name='products', postgresql_concurrently=True, if_exists=True)
+            op.create_index(index, 'products', columns, postgresql_concurrently=True)
+        for index in INDEXES:
+            op.drop_index(index, table_name='products', postgresql_concurrently=True, if_exists=True)
@@ -5,20 +5,51 @@ This module contains the system-wide configuration components for the applicatio
 response handling, security, and settings.
 
 Modules:
+- cache: Bounded in-process caches and pluggable page caches for catalog reads.
+- coalescing: Single-flight sharing of concurrent identical reads.
+- compression: Content coding negotiation, response compression and precompressed response bodies.
+- conditional: ETag and Last-Modified validation of catalog GET requests.
+- fieldsets: Sparse fieldsets selected with the `fields` query parameter.
+- hashing: Bounded thread pool computing password hashes off the event loop.
 - logging: Setup and configuration for application logging.
+- pagination: Signed cursors for keyset pagination of list endpoints.
 - responses: Utilities for standardized API responses and HTTP exceptions.
+- revocation: Revocation of single use refresh tokens.
 - security: Authentication and authorization utilities.
+- serialization: Single pass JSON serialization of hot responses.
 - settings: Application and environment configurations.
+- throttling: Token-bucket throttling of login attempts.
 """
 
+from .cache import MISSING, TTLCache, CacheBackend, MemoryBackend, RedisBackend, PageCache, product_cache, category_cache, product_pages, category_pages, get_caches
+from .coalescing import SingleFlight, product_flights
+from .fieldsets import parse_fields, load_fields, sparse_model
+from .hashing import PasswordHashPool, password_hash_pool
 from .logging import logger
-from .responses import CustomBaseModel, ResponseHandler
-from .security import auth_scheme, get_password_hash, verify_password, get_user_token, get_token_payload, get_current_user, check_admin_role
+from .pagination import encode_cursor, decode_cursor, paginate, next_cursor
+from .responses import CustomBaseModel, ResponseHandler, database_error_handler
+from .security import auth_scheme, get_password_hash, verify_password, password_needs_rehash, get_user_token, get_token_payload, TokenMemoMiddleware, get_current_user, token_cache, role_cache, cache_user_role, check_admin_role
+from .throttling import TokenBucketLimiter, username_limiter, ip_limiter, throttle_login
+from .revocation import RevocationSet, revoked_tokens, purge_revoked_tokens, load_revoked_tokens, revoke_token
+from .serialization import get_type_adapter, dump_json, JSONBytesResponse, json_response
+from .conditional import CatalogValidators, product_validators, category_validators
+from .compression import ENCODINGS, compress, choose_encoding, PrecompressedBody, StreamCompressor, CompressionMiddleware
 from .settings import DB_URL, ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY
 
 __all__ = [
+    "MISSING", "TTLCache", "CacheBackend", "MemoryBackend", "RedisBackend", "PageCache",
+    "product_cache", "category_cache", "product_pages", "category_pages", "get_caches",
+    "SingleFlight", "product_flights",
+    "parse_fields", "load_fields", "sparse_model",
+    "PasswordHashPool", "password_hash_pool",
     "logger",    
-    "CustomBaseModel", "ResponseHandler",
-    "auth_scheme","get_password_hash", "verify_password", "get_user_token", "get_token_payload", "get_current_user", "check_admin_role",
+    "encode_cursor", "decode_cursor", "paginate", "next_cursor",
+    "CustomBaseModel", "ResponseHandler", "database_error_handler",
+    "auth_scheme","get_password_hash", "verify_password", "password_needs_rehash", "get_user_token", "get_token_payload", "TokenMemoMiddleware", "get_current_user", "token_cache", "role_cache", "cache_user_role", "check_admin_role",
+    "TokenBucketLimiter", "username_limiter", "ip_limiter", "throttle_login",
+    "RevocationSet", "revoked_tokens", "purge_revoked_tokens", "load_revoked_tokens", "revoke_token",
+    "get_type_adapter", "dump_json", "JSONBytesResponse", "json_response",
+    "CatalogValidators", "product_validators", "category_validators",
+    "ENCODINGS", "compress", "choose_encoding", "PrecompressedBody", "StreamCompressor", "CompressionMiddleware",
     "DB_URL", "ACCESS_TOKEN_EXPIRE_MINUTES", "ALGORITHM", "SECRET_KEY"
 ]
@@ -0,0 +1,222 @@
+"""
+This module provides the caches placed in front of the hottest catalog reads.
+
+- Detail reads use in-process caches. Each cache is bounded: entries expire after a fixed time to live,
+  and once full the least recently used entry is evicted. Entries are stored with the catalog version
+  they were read at, and only served to requests of that version or an earlier one, so a write of any
+  worker retires them once the version is read again. Writes of this worker also delete them explicitly.
+- Listing pages use a `CacheBackend` selected by `CACHE_BACKEND`, either in memory or on a Redis server
+  shared by every worker. Pages are keyed under the catalog version shared by every worker through the
+  `catalog_versions` table, so a write of any worker retires the pages cached before it, as soon as the
+  version is read again, within `CATALOG_VERSION_TTL_SECONDS` on the other workers. Pages are also keyed
+  under a version of their namespace in the backend, which the writes bump at once: for every worker
+  sharing a Redis server, for this worker only in memory.
+"""
+
+import hashlib
+import json
+import time
+from .logging import logger
+from .settings import CACHE_BACKEND, CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS, REDIS_URL
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+# Returned by `TTLCache.get` on a miss, since `None` may be a cached value
+MISSING = object()
+
+
+class TTLCache:
+    """
+    A bounded mapping whose entries expire after `ttl` seconds, evicting the least recently used entry when full.
+
+    Methods:
+        `get(key)`: Returns the live value cached under `key`, or `MISSING`.
+        `set(key, value, ttl)`: Caches `value` under `key`, evicting the least recently used entry if full.
+        `delete(key)`: Invalidates the entry cached under `key`, if any.
+        `clear()`: Invalidates every entry.
+        `stats()`: Returns the size, limits and hit/miss/eviction counters of the cache.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float) -> None:
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def get(self, key: Hashable) -> Any:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self.entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return MISSING
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self.entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        if self.entries.pop(key, None) is not None:
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self.invalidations += len(self.entries)
+        self.entries.clear()
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "size": len(self.entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
+
+
+class CacheBackend(ABC):
+    """
+    Interface of the stores holding cached listing pages, all values are bytes.
+
+    Methods:
+        `get(key)`: Returns the value stored under `key`, or `None`.
+        `set(key, value, ttl)`: Stores `value` under `key` for `ttl` seconds.
+        `incr(key)`: Increments the counter stored under `key`, starting from 0, and returns it.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int:
+        ...
+
+
+class MemoryBackend(CacheBackend):
+    "Stores values in a `TTLCache` of this worker, each worker then caches and invalidates on its own."
+
+    def __init__(self, max_entries: int) -> None:
+        self.cache = TTLCache("pages", max_entries, CACHE_TTL_SECONDS)
+        self.counters = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if key in self.counters:
+            return str(self.counters[key]).encode()
+        value = self.cache.get(key)
+        return None if value is MISSING else value
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self.cache.set(key, value, ttl)
+
+    async def incr(self, key: str) -> int:
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return self.counters[key]
+
+
+class RedisBackend(CacheBackend):
+    "Stores values on a server speaking the Redis protocol, shared by every worker."
+
+    def __init__(self, url: str) -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError("The `redis` package is required for CACHE_BACKEND=redis.") from e
+        self.client = redis.from_url(url)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.client.set(key, value, px=int(ttl * 1000))
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+
+class PageCache:
+    """
+    Caches the listing pages of a namespace in a `CacheBackend`, under the current version of the namespace.
+    Failures of the backend are logged and handled as misses, the pages are then served from the database.
+
+    Methods:
+        `key(**params)`: Returns the key of the page listed with `params`, under the current version.
+        `get(key)`: Returns the page cached under `key`, or `None`.
+        `set(key, page)`: Caches `page` under `key`.
+        `invalidate()`: Bumps the version of the namespace, so no page cached until now is served again.
+    """
+
+    def __init__(self, backend: CacheBackend, namespace: str, ttl: float) -> None:
+        self.backend = backend
+        self.namespace = namespace
+        self.ttl = ttl
+        self.version_key = f"{namespace}:version"
+
+    async def key(self, **params) -> Optional[str]:
+        try:
+            version = int(await self.backend.get(self.version_key) or 0)
+        except Exception:
+            logger.exception(f"Failed to read the version of the {self.namespace} page cache.")
+            return None
+        digest = hashlib.sha256(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+        return f"{self.namespace}:v{version}:{digest}"
+
+    async def get(self, key: Optional[str]) -> Optional[bytes]:
+        if key is None:
+            return None
+        try:
+            return await self.backend.get(key)
+        except Exception:
+            logger.exception(f"Failed to read from the {self.namespace} page cache.")
+            return None
+
+    async def set(self, key: Optional[str], page: bytes) -> None:
+        if key is None:
+            return
+        try:
+            await self.backend.set(key, page, self.ttl)
+        except Exception:
+            logger.exception(f"Failed to write to the {self.namespace} page cache.")
+
+    async def invalidate(self) -> None:
+        try:
+            await self.backend.incr(self.version_key)
+        except Exception:
+            logger.exception(f"Failed to invalidate the {self.namespace} page cache.")
+
+
+# Detail reads of the catalog, keyed by ID
+product_cache = TTLCache("products", CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+category_cache = TTLCache("categories", CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+
+# Listing pages of the catalog, keyed by their normalized query parameters
+cache_backend = RedisBackend(REDIS_URL) if CACHE_BACKEND == "redis" else MemoryBackend(CACHE_MAX_ENTRIES)
+product_pages = PageCache(cache_backend, "products", CACHE_TTL_SECONDS)
+category_pages = PageCache(cache_backend, "categories", CACHE_TTL_SECONDS)
+
+
+def get_caches() -> list:
+    "Returns every in-process cache of this worker."
+    caches = [product_cache, category_cache]
+    if isinstance(cache_backend, MemoryBackend):
+        caches.append(cache_backend.cache)
+    return caches
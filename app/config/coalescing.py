@@ -0,0 +1,85 @@
+"""
+This module coalesces concurrent identical database reads, so that they share a single query.
+
+The first request for a key runs the read, and every identical request arriving while it is in flight
+awaits its result instead of running its own. Only reads that missed the caches are coalesced, requests
+served from a cache never get here. Writes forget the reads in flight, so a client never joins a read
+started before its own write. Each key counts the reads it ran and the requests it collapsed into them,
+for the most recently used keys.
+"""
+
+import asyncio
+from .settings import CACHE_MAX_ENTRIES
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Runs at most one read per key at a time, sharing its result with the identical reads arriving meanwhile.
+
+    Methods:
+        `do(key, read)`: Awaits `read()`, or the result of the identical read in flight under `key`.
+        `forget()`: Lets the next reads start afresh, rather than join the reads in flight.
+        `stats()`: Returns the reads in flight and the per-key counters of reads run and requests collapsed.
+    """
+
+    def __init__(self, name: str, max_keys: int) -> None:
+        self.name = name
+        self.max_keys = max_keys
+        self.flights = {}
+        self.counters = OrderedDict()
+
+    def _count(self, key: Hashable, field: int) -> None:
+        counters = self.counters.setdefault(key, [0, 0])
+        counters[field] += 1
+        self.counters.move_to_end(key)
+        while len(self.counters) > self.max_keys:
+            self.counters.popitem(last=False)
+
+    async def do(self, key: Hashable, read: Callable[[], Awaitable[Any]]) -> Any:
+        while key in self.flights:
+            future = self.flights[key]
+            self._count(key, 1)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                # The read itself was cancelled with its request, this request then runs it again
+                if not future.cancelled():
+                    raise
+        future = asyncio.get_running_loop().create_future()
+        self.flights[key] = future
+        self._count(key, 0)
+        try:
+            result = await read()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            # Marks the exception as retrieved, even when no other request awaited it
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if self.flights.get(key) is future:
+                del self.flights[key]
+
+    def forget(self) -> None:
+        self.flights.clear()
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "in_flight": len(self.flights),
+            "reads": sum(reads for reads, _ in self.counters.values()),
+            "collapsed": sum(collapsed for _, collapsed in self.counters.values()),
+            "keys": [{"key": str(key), "reads": reads, "collapsed": collapsed}
+                     for key, (reads, collapsed) in reversed(self.counters.items())],
+        }
+
+
+# Product listings, keyed by their normalized query parameters
+product_flights = SingleFlight("products", CACHE_MAX_ENTRIES)
@@ -0,0 +1,163 @@
+"""
+This module compresses response bodies and negotiates their content coding with clients.
+
+Brotli is used when the optional `brotli` package is installed, gzip is always available.
+Bodies that never change between requests are compressed once, at the highest levels,
+and each variant is served as is. Every other response large enough, and of a textual content type,
+is compressed on the way out by `CompressionMiddleware`, at the configured levels.
+"""
+
+import gzip
+import hashlib
+import zlib
+from .conditional import encoded_etag, etag_matches
+from .settings import BROTLI_QUALITY, COMPRESSION_CONTENT_TYPES, COMPRESSION_MIN_SIZE, GZIP_LEVEL
+from fastapi import Request, Response, status
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Iterable, Optional
+
+try:
+    import brotli
+except ImportError:  # Optional dependency, bodies are then only gzipped
+    brotli = None
+
+# Content codings this worker can produce, in order of preference
+ENCODINGS = ("br", "gzip") if brotli else ("gzip",)
+
+
+def compress(body: bytes, encoding: str, level: Optional[int] = None) -> bytes:
+    "Compresses `body` with the `br` or `gzip` content coding, at the highest level by default."
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if level is None else level)
+    return gzip.compress(body, compresslevel=9 if level is None else level, mtime=0)
+
+
+def choose_encoding(accept_encoding: str, encodings: Iterable[str] = ENCODINGS) -> str:
+    "Picks the preferred content coding of `encodings` accepted by an `Accept-Encoding` header, or `identity`."
+    accepted = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().lower().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding.strip()] = quality
+    for encoding in encodings:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return "identity"
+
+
+class PrecompressedBody:
+    """
+    A response body compressed once with every available content coding.
+    Each variant has its own strong ETag, as their bytes differ.
+
+    Methods:
+        `response(request, headers)`: Serves the variant accepted by `request`, or a 304 if the client's copy is current.
+    """
+
+    def __init__(self, body: bytes, media_type: str) -> None:
+        self.media_type = media_type
+        self.variants = {"identity": body, **{encoding: compress(body, encoding) for encoding in ENCODINGS}}
+        digest = hashlib.sha256(body).hexdigest()[:32]
+        self.etags = {encoding: encoded_etag(f'"{digest}"', encoding) for encoding in self.variants}
+
+    def response(self, request: Request, headers: Optional[dict] = None) -> Response:
+        encoding = choose_encoding(request.headers.get("Accept-Encoding", ""), ENCODINGS)
+        headers = {"ETag": self.etags[encoding], "Vary": "Accept-Encoding", **(headers or {})}
+        if_none_match = request.headers.get("If-None-Match")
+        # Every variant holds the same content, so any of their tags validates the client's copy
+        if if_none_match is not None and any(etag_matches(if_none_match, etag) for etag in self.etags.values()):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        return Response(content=self.variants[encoding], media_type=self.media_type, headers=headers)
+
+
+class StreamCompressor:
+    "Compresses a response body sent in several chunks with the `br` or `gzip` content coding."
+
+    def __init__(self, encoding: str, level: int) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self.compressor = brotli.Compressor(quality=level)
+        else:
+            self.compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes, last: bool) -> bytes:
+        if self.encoding == "br":
+            return self.compressor.process(chunk) + (self.compressor.finish() if last else b"")
+        return self.compressor.compress(chunk) + (self.compressor.flush() if last else b"")
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing the responses of `content_types` of at least `min_size` bytes with the preferred
+    content coding the client accepts. Responses that are already encoded, such as precompressed bodies, pass through.
+    A compressed response's strong ETag is suffixed with its coding, like the variants of a precompressed body,
+    as its bytes differ from the uncompressed ones. Weak ETags are left as they are.
+    """
+
+    def __init__(self, app: ASGIApp, min_size: int = COMPRESSION_MIN_SIZE,
+                 content_types: Iterable[str] = COMPRESSION_CONTENT_TYPES) -> None:
+        self.app = app
+        self.min_size = min_size
+        self.content_types = {content_type.strip().lower() for content_type in content_types}
+        self.levels = {"br": BROTLI_QUALITY, "gzip": GZIP_LEVEL}
+
+    def compressible(self, headers: MutableHeaders) -> bool:
+        content_type = headers.get("Content-Type", "").partition(";")[0].strip().lower()
+        return content_type in self.content_types and "Content-Encoding" not in headers
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("Accept-Encoding", ""))
+        # The start of the response is held until its first chunk, which tells whether to compress it
+        start: Optional[Message] = None
+        compressor: Optional[StreamCompressor] = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            body, more_body = message.get("body", b""), message.get("more_body", False)
+            if compressor is not None:
+                await send({**message, "body": compressor.compress(body, not more_body)})
+                return
+            if start is None:
+                await send(message)
+                return
+            headers = MutableHeaders(scope=start)
+            if self.compressible(headers):
+                if "accept-encoding" not in headers.get("Vary", "").lower():
+                    headers.add_vary_header("Accept-Encoding")
+                if encoding != "identity" and (more_body or len(body) >= self.min_size):
+                    headers["Content-Encoding"] = encoding
+                    etag = headers.get("ETag")
+                    if etag is not None and not etag.startswith("W/"):
+                        headers["ETag"] = encoded_etag(etag, encoding)
+                    if more_body:
+                        compressor = StreamCompressor(encoding, self.levels[encoding])
+                        del headers["Content-Length"]
+                        body = compressor.compress(body, False)
+                    else:
+                        body = compress(body, encoding, self.levels[encoding])
+                        headers["Content-Length"] = str(len(body))
+                    message = {**message, "body": body}
+            await send(start)
+            start = None
+            await send(message)
+
+        await self.app(scope, receive, send_compressed)
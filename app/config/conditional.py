@@ -0,0 +1,116 @@
+"""
+This module implements conditional GET for the catalog routes.
+
+Responses carry a strong `ETag` and a `Last-Modified` date taken from the version of the catalog table
+they are read from, which a database trigger bumps on every write. Each worker keeps the versions it read
+for `CATALOG_VERSION_TTL_SECONDS` and drops them on its own writes, so checking a request's validators
+mostly costs no query, and a client whose copy is current gets a 304 before the route runs any query
+or serializes anything. Writes of the other workers show within that time to live.
+
+The catalog caches are keyed by the same version, which routes get from their validators, so a body
+cached before a write is never served under the ETag of a version after it.
+"""
+
+from .logging import logger
+from .responses import ResponseHandler
+from .settings import CATALOG_MAX_AGE, CATALOG_VERSION_TTL_SECONDS
+from app.database import CatalogVersion, get_read_session, primary_session
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Depends, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+import time
+
+# Content codings a body may be served with, each variant being tagged apart
+CONTENT_CODINGS = ("identity", "br", "gzip")
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    "Returns the strong ETag of the `encoding` variant of a body tagged `etag`, as its bytes differ."
+    return etag if encoding == "identity" else f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    "Checks `etag` against an `If-None-Match` header, with the weak comparison it calls for."
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+def not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    "Checks whether `last_modified` is no later than an `If-Modified-Since` header, at the header's one second precision."
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return since.tzinfo is not None and last_modified.replace(microsecond=0) <= since
+
+
+class CatalogValidators:
+    """
+    Dependency validating a conditional GET on a catalog table, named by `table`.
+    Sets the `ETag`, `Last-Modified` and `Cache-Control` headers of the response,
+    or raises a 304 with them when the client's copy is still current.
+    Returns the version of the table otherwise, for the route to read its caches under the version of its ETag.
+
+    Methods:
+        `get_version(db)`: Returns the version of the table and the time of its last write, read at most once per time to live.
+        `forget()`: Drops the version kept in process, for the next request to read the one of a write of this worker.
+    """
+
+    def __init__(self, table: str) -> None:
+        self.table = table
+        # The last version read, as (expires_at, version, updated_at), and the number of writes forgotten so far
+        self.current = None
+        self.generation = 0
+
+    async def get_version(self, db: AsyncSession) -> tuple:
+        current = self.current
+        if current is not None and current[0] > time.monotonic():
+            return current[1:]
+        generation = self.generation
+        # Read from the primary, a lagging replica would keep an outdated version for the whole time to live
+        async with primary_session(db) as primary:
+            version, updated_at = (await primary.execute(select(CatalogVersion.version, CatalogVersion.updated_at)
+                                                         .filter(CatalogVersion.name == self.table))).one()
+        # Not kept if a write was forgotten during the read, which may miss it, or if a newer read finished first
+        if generation == self.generation and (self.current is None or version >= self.current[1]):
+            self.current = (time.monotonic() + CATALOG_VERSION_TTL_SECONDS, version, updated_at)
+        return version, updated_at
+
+    def forget(self) -> None:
+        self.current = None
+        self.generation += 1
+
+    async def __call__(self, request: Request, response: Response,
+                       db: AsyncSession = Depends(get_read_session)) -> int:
+        version, updated_at = await self.get_version(db)
+        last_modified = updated_at.astimezone(timezone.utc)
+        headers = {
+            "ETag": f'"{self.table}-{version}"',
+            "Last-Modified": format_datetime(last_modified, usegmt=True),
+            "Cache-Control": f"public, max-age={CATALOG_MAX_AGE}",
+            "Vary": "Accept-Encoding",
+        }
+        # `If-Modified-Since` is only considered without `If-None-Match`
+        if_none_match = request.headers.get("If-None-Match")
+        if_modified_since = request.headers.get("If-Modified-Since")
+        if if_none_match is not None:
+            # The client may hold any coding of the body, the 304 echoes the tag of the one it holds
+            etag = next((etag for etag in (encoded_etag(headers["ETag"], encoding) for encoding in CONTENT_CODINGS)
+                         if etag_matches(if_none_match, etag)), None)
+            current = etag is not None
+        else:
+            etag = headers["ETag"]
+            current = if_modified_since is not None and not_modified_since(if_modified_since, last_modified)
+        if current:
+            logger.info(f"Client copy of {request.url.path} is current at {self.table} version {version}.")
+            ResponseHandler.not_modified({**headers, "ETag": etag})
+        response.headers.update(headers)
+        return version
+
+
+# Dependencies of the product and category GET routes
+product_validators = CatalogValidators("products")
+category_validators = CatalogValidators("categories")
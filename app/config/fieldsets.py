@@ -0,0 +1,50 @@
+"""
+This module implements sparse fieldsets: the `fields` query parameter of the catalog and cart reads.
+
+A request listing the fields it needs gets them only, with `id` always included. The rows are loaded with
+only the matching columns, and serialized by a trimmed copy of the response model, built once per fieldset,
+so both the database reads and the payloads shrink.
+"""
+
+from .responses import CustomBaseModel, ResponseHandler
+from copy import copy
+from functools import lru_cache
+from pydantic import BaseModel, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import load_only
+from typing import Any, List, Optional, Type, get_args, get_origin
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[tuple]:
+    "Parses a comma separated list of the fields of `schema`, returns them in the schema's order, or `None` for all."
+    if not fields:
+        return None
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = sorted(requested - schema.model_fields.keys())
+    if unknown:
+        ResponseHandler.malformed_request(f"Unknown fields: {', '.join(unknown)}. Available fields: {', '.join(schema.model_fields)}.")
+    return tuple(field for field in schema.model_fields if field in requested or field == "id")
+
+
+def load_fields(model: Any, fields: Optional[tuple], *keys: Any) -> list:
+    "Returns the loader options selecting only the columns of `model` in `fields`, plus the `keys` columns needed to paginate."
+    if fields is None:
+        return []
+    columns = inspect(model).columns.keys()
+    return [load_only(*(getattr(model, field) for field in fields if field in columns),
+                      *(key for key in keys if getattr(key, "class_", None) is model))]
+
+
+@lru_cache(maxsize=None)
+def sparse_model(schema: Type[BaseModel], fields: Optional[tuple]) -> Type[BaseModel]:
+    "Returns a copy of the response model `schema` whose `data` items only have `fields`, or `schema` itself for all fields."
+    if fields is None:
+        return schema
+    data = schema.model_fields["data"]
+    many = get_origin(data.annotation) in (list, List)
+    item = get_args(data.annotation)[0] if many else data.annotation
+    # Pydantic completes the field infos of a new model in place, so the models get copies of them
+    trimmed = create_model(f"{item.__name__}Sparse", __base__=CustomBaseModel,
+                           **{field: (item.model_fields[field].annotation, copy(item.model_fields[field])) for field in fields})
+    return create_model(f"{schema.__name__}Sparse", __base__=schema,
+                        data=(List[trimmed] if many else trimmed, copy(data)))
@@ -0,0 +1,67 @@
+"""
+This module runs password hashing off the event loop.
+
+A bcrypt round takes hundreds of milliseconds of CPU, which would stall every other request of the worker
+if run on the event loop. Hashes are computed on a bounded pool of threads instead (bcrypt releases the GIL,
+so they run in parallel), and the jobs waiting for a thread are counted and timed, to size the pool.
+"""
+
+import asyncio
+import time
+from .settings import PASSWORD_HASH_WORKERS
+from app.database.pool import WaitHistogram
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable
+
+
+class PasswordHashPool:
+    """
+    Bounded pool of threads computing password hashes.
+
+    Methods:
+        `run(function, *args)`: Awaits `function(*args)` run on a thread of the pool.
+        `stats()`: Returns the size of the pool, its queued, running and completed jobs and their queue wait times.
+    """
+
+    def __init__(self, workers: int) -> None:
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self.wait_histogram = WaitHistogram()
+        self._lock = Lock()
+        self.queued = self.running = self.completed = self.max_queued = 0
+
+    def _job(self, submitted_at: float, function: Callable, args: tuple) -> Any:
+        self.wait_histogram.observe(time.perf_counter() - submitted_at)
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+        try:
+            return function(*args)
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.completed += 1
+
+    def _dequeue_cancelled(self, future: Future) -> None:
+        # Jobs cancelled with their request before a thread picked them up never run
+        if future.cancelled():
+            with self._lock:
+                self.queued -= 1
+
+    async def run(self, function: Callable, *args) -> Any:
+        with self._lock:
+            self.queued += 1
+            self.max_queued = max(self.max_queued, self.queued)
+        future = self.executor.submit(self._job, time.perf_counter(), function, args)
+        future.add_done_callback(self._dequeue_cancelled)
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counters = {"queued": self.queued, "running": self.running,
+                        "completed": self.completed, "max_queued": self.max_queued}
+        return {"workers": self.workers, **counters, "wait_time": self.wait_histogram.snapshot()}
+
+
+password_hash_pool = PasswordHashPool(PASSWORD_HASH_WORKERS)
@@ -0,0 +1,76 @@
+"""
+This module implements keyset (cursor) pagination for the list endpoints.
+
+A cursor is an opaque string holding the sort key and ID of the last row of a page, signed with
+`SECRET_KEY` so clients cannot forge or alter it. The next page starts right after that row, which
+stays fast on deep pages and does not skip or repeat rows when others are inserted meanwhile.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+from .responses import ResponseHandler
+from .settings import SECRET_KEY
+from datetime import datetime
+from sqlalchemy import Select, tuple_
+from typing import Any, Optional, Sequence
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(SECRET_KEY.encode(), payload, hashlib.sha256).digest()
+
+
+def encode_cursor(scope: str, values: Sequence[Any]) -> str:
+    "Encodes and signs the key `values` of a row, for the listing named `scope`."
+    payload = json.dumps([scope, [value.isoformat() if isinstance(value, datetime) else value for value in values]],
+                         separators=(",", ":")).encode()
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def decode_cursor(scope: str, cursor: str) -> list:
+    "Verifies a cursor issued for the listing named `scope` and returns its key values."
+    try:
+        payload, signature = (_b64decode(part) for part in cursor.split("."))
+        if not hmac.compare_digest(signature, _sign(payload)):
+            raise ValueError("Bad signature")
+        cursor_scope, values = json.loads(payload)
+        if cursor_scope != scope or not isinstance(values, list):
+            raise ValueError("Cursor issued for another listing")
+        return values
+    except (TypeError, ValueError):
+        ResponseHandler.malformed_request("Invalid pagination cursor.")
+
+
+def paginate(query: Select, scope: str, keys: Sequence[Any], page: int, limit: int,
+             after: Optional[str] = None, descending: bool = False) -> Select:
+    """
+    Orders `query` by the `keys` columns (sort key first, unique ID last) and selects one page of it.
+    The page starts after the `after` cursor when given, otherwise `page` is used as an offset.
+    """
+    query = query.order_by(*(key.desc() if descending else key.asc() for key in keys)).limit(limit)
+    if not after:
+        return query.offset((page-1) * limit)
+    values = decode_cursor(scope, after)
+    if len(values) != len(keys):
+        ResponseHandler.malformed_request("Invalid pagination cursor.")
+    values = [datetime.fromisoformat(value) if key.type.python_type is datetime and value is not None else value
+              for key, value in zip(keys, values)]
+    if descending:
+        return query.filter(tuple_(*keys) < tuple_(*values))
+    return query.filter(tuple_(*keys) > tuple_(*values))
+
+
+def next_cursor(scope: str, keys: Sequence[Any], rows: Sequence[Any], limit: int) -> Optional[str]:
+    "Returns the cursor of the page following `rows`, or `None` if it was the last page."
+    if len(rows) < limit:
+        return None
+    return encode_cursor(scope, [getattr(rows[-1], key.key) for key in keys])
@@ -3,9 +3,14 @@ This module provides utilities for creating standardized API responses and handl
 It includes helper functions for success responses and predefined exceptions for common HTTP errors.
 """
 
-from fastapi import HTTPException, status
+from fastapi import HTTPException, Request, status
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel, ConfigDict
-from typing import Any
+from sqlalchemy.exc import DBAPIError
+from typing import Any, Optional
+
+# SQLSTATE of `nextval` past the maximum value of a sequence, i.e. an id range used up
+SEQUENCE_LIMIT_EXCEEDED = "2200H"
 
 
 class CustomBaseModel(BaseModel):
@@ -27,14 +32,16 @@ class ResponseHandler:
     Methods:
         `success(message, data)`: Returns a success response with a message and optional data.
         `get_single_success(name, id, data)`: Returns a success response for a single resource with a message and data.
-        `get_all_success(page, limit, name, data)`: Returns a success response for multiple resources with pagination details.
+        `get_all_success(page, limit, name, data, next_cursor)`: Returns a success response for multiple resources with pagination details.
         `create_success(name, id, data)`: Returns a success response when a resource is created.
         `update_success(name, id, data)`: Returns a success response when a resource is updated.
         `delete_success(name, id, data)`: Returns a success response when a resource is deleted.
+        `not_modified(headers)`: Raises a 304 HTTP response when the client's copy is current.
         `malformed_request(message)`: Raises a 400 HTTP error for malformed requests.
         `invalid_credentials(message)`: Raises a 401 HTTP error for invalid credentials.
         `restricted_access()`: Raises a 403 HTTP error for unauthorized access.
         `not_found_error(item)`: Raises a 404 HTTP error when a resource is not found.
+        `too_many_requests(retry_after)`: Raises a 429 HTTP error when a client exceeds a rate limit.
     """
 
     @staticmethod
@@ -49,10 +56,10 @@ class ResponseHandler:
         return ResponseHandler.success(message, data)
 
     @staticmethod
-    def get_all_success(page: int, limit: int, name: str, data: Any) -> dict:
-        "Returns a success response for a single resource with a message and data."
+    def get_all_success(page: int, limit: int, name: str, data: Any, next_cursor: Optional[str] = None) -> dict:
+        "Returns a success response for a single resource with a message, data and the cursor of the next page."
         message = f"Page {page} with limit {limit} {name}"
-        return ResponseHandler.success(message, data)
+        return {**ResponseHandler.success(message, data), "next_cursor": next_cursor}
 
     @staticmethod
     def create_success(name: str, id: int, data: Any) -> dict:
@@ -72,6 +79,12 @@ class ResponseHandler:
         message = f"{name} with id {id} deleted successfully"
         return ResponseHandler.success(message, data)
 
+    @staticmethod
+    def not_modified(headers: dict) -> None:
+        "Raises a 304 response, without a body, when the client's copy is current."
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED,
+                            headers=headers)
+
     @staticmethod
     def malformed_request(message: str) -> None:
         "Raises a 400 error."
@@ -89,10 +102,25 @@ class ResponseHandler:
     def restricted_access() -> None:
         "Raises a 403 error when the user is not an admin."
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
-                            details="Admin role required")
+                            detail="Admin role required")
 
     @staticmethod
     def not_found_error(item: str) -> None:
         "Raises a 404 error when a resource is not found."
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
                             detail=f"{item} Not Found!")
+
+    @staticmethod
+    def too_many_requests(retry_after: int) -> None:
+        "Raises a 429 error when a client exceeds a rate limit, telling it when to retry."
+        raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                            headers={"Retry-After": str(retry_after)},
+                            detail="Too many attempts, try again later.")
+
+
+async def database_error_handler(request: Request, exc: DBAPIError) -> ORJSONResponse:
+    "Answers a create whose id range is used up with a 409 error, any other database error stays a 500."
+    if getattr(exc.orig, "pgcode", None) != SEQUENCE_LIMIT_EXCEEDED:
+        raise exc
+    return ORJSONResponse(status_code=status.HTTP_409_CONFLICT,
+                          content={"detail": "No ids are left in the id range of this resource"})
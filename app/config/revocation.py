@@ -0,0 +1,109 @@
+"""
+This module revokes refresh tokens, which are single use: every refresh revokes the token it was made with.
+
+Revoked tokens are stored in the `revoked_tokens` table until they expire, and the worker keeps their IDs
+in memory, loaded at startup, so a revoked token is turned down without a query. Revoking inserts the
+token's ID, which is its primary key, so a token used twice, even on two workers, is only accepted once.
+
+Both only hold the revocations of unexpired tokens: the worker forgets a revocation once its token
+expires, and purges the expired rows of the table every `REVOKED_TOKENS_PURGE_SECONDS`.
+"""
+
+import heapq
+import time
+from .logging import logger
+from .settings import REVOKED_TOKENS_PURGE_SECONDS
+from app.database import RevokedToken, open_session
+from datetime import datetime, timezone
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from threading import Lock
+
+
+class RevocationSet:
+    """
+    IDs of the revoked tokens that have not expired yet, in the memory of the worker.
+
+    Methods:
+        `add(jti, expires_at)`: Records the token `jti` as revoked until its expiry, a UNIX timestamp.
+        `__contains__(jti)`: Returns whether the token `jti` was revoked.
+        `purge_due()`: Returns whether the expired rows of the table are due for a purge, claiming it if so.
+    """
+
+    def __init__(self, purge_interval: float) -> None:
+        self.purge_interval = purge_interval
+        self._lock = Lock()
+        self._expiries = {}
+        # (expires_at, jti) of every entry, soonest expiry first
+        self._queue = []
+        self._purge_at = 0.0
+
+    def add(self, jti: str, expires_at: float) -> None:
+        now = time.time()
+        with self._lock:
+            self._expiries[jti] = expires_at
+            heapq.heappush(self._queue, (expires_at, jti))
+            # Forget the tokens expired so far, so the set stays bounded by the revocations of one token lifetime
+            while self._queue and self._queue[0][0] <= now:
+                expiry, key = heapq.heappop(self._queue)
+                if self._expiries.get(key) == expiry:
+                    del self._expiries[key]
+
+    def __contains__(self, jti: str) -> bool:
+        with self._lock:
+            expiry = self._expiries.get(jti)
+        return expiry is not None and expiry > time.time()
+
+    def __len__(self) -> int:
+        return len(self._expiries)
+
+    def purge_due(self) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if now < self._purge_at:
+                return False
+            self._purge_at = now + self.purge_interval
+            return True
+
+
+revoked_tokens = RevocationSet(REVOKED_TOKENS_PURGE_SECONDS)
+
+
+async def purge_revoked_tokens(db: AsyncSession) -> None:
+    "Deletes the revocations of the expired tokens from the database, in the transaction of `db`."
+    purged = await db.execute(delete(RevokedToken)
+                              .filter(RevokedToken.expires_at <= datetime.now(timezone.utc)))
+    logger.info(f"Purged {purged.rowcount} expired revoked refresh tokens.")
+
+
+async def load_revoked_tokens() -> None:
+    "Purges the expired revocations from the database and loads the others in memory."
+    db = await open_session()
+    try:
+        if revoked_tokens.purge_due():
+            await purge_revoked_tokens(db)
+            await db.commit()
+        rows = (await db.execute(select(RevokedToken.jti, RevokedToken.expires_at)
+                                 .filter(RevokedToken.expires_at > datetime.now(timezone.utc)))).all()
+    finally:
+        await db.close()
+    for jti, expires_at in rows:
+        revoked_tokens.add(jti, expires_at.timestamp())
+    logger.info(f"Loaded {len(rows)} revoked refresh tokens.")
+
+
+async def revoke_token(db: AsyncSession, payload: dict) -> bool:
+    "Revokes the refresh token of `payload`, returns `False` if it was already revoked."
+    if payload["jti"] in revoked_tokens:
+        return False
+    expires_at = datetime.fromtimestamp(payload["exp"], timezone.utc)
+    if revoked_tokens.purge_due():
+        await purge_revoked_tokens(db)
+    revoked = await db.scalar(insert(RevokedToken)
+                              .values(jti=payload["jti"], user_id=payload["id"], expires_at=expires_at)
+                              .on_conflict_do_nothing(index_elements=[RevokedToken.jti])
+                              .returning(RevokedToken.jti))
+    await db.commit()
+    revoked_tokens.add(payload["jti"], payload["exp"])
+    return revoked is not None
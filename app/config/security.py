@@ -2,51 +2,82 @@
 This module handles authentication and authorization for the application. 
 
 Features:
-- Password hashing and verification.
-- JWT token creation and validation.
+- Password hashing and verification, off the event loop.
+- JWT token creation and validation, with single use refresh tokens.
 - User extraction from tokens.
-- Role-based access control.
+- Role-based access control, from signed claims of the access token.
+
+Tokens carry the role and active flag of their user, and when these were read. The claims are trusted for
+`ROLE_CACHE_TTL_SECONDS` from then on, past that the user is looked up once and the result cached for as long.
+Users updated or deleted by this worker are cached right away, so checking the role of an admin
+is a CPU-only check on nearly every request, and a demoted admin keeps access for at most `ROLE_CACHE_TTL_SECONDS`.
+
+Verified token payloads are cached by digest until the token expires, and memoized for the duration of
+a request by `TokenMemoMiddleware`, so a token's signature is verified once rather than on every request.
 """
 
+import hashlib
+import time
+import uuid
+from .cache import MISSING, TTLCache
+from .hashing import password_hash_pool
 from .logging import logger
 from .responses import ResponseHandler
-from .settings import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, SECRET_KEY
-from app.database import get_db, User
+from .settings import ACCESS_TOKEN_EXPIRE_MINUTES, ALGORITHM, BCRYPT_ROUNDS, CACHE_MAX_ENTRIES, REFRESH_TOKEN_EXPIRE_DAYS, ROLE_CACHE_TTL_SECONDS, SECRET_KEY
+from app.database import open_session, User
 from app.schemas import TokenResponse
+from contextvars import ContextVar
 from datetime import datetime, timedelta, timezone
 from fastapi import Depends
 from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
 from jose import JWTError, jwt
 from passlib.context import CryptContext
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from starlette.types import ASGIApp, Receive, Scope, Send
+from typing import Optional
 
-# Password Hashing Context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password Hashing Context, hashes of another cost are rehashed on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 auth_scheme = HTTPBearer()
 
+# Role and active flag of users, keyed by ID, `None` once deleted
+role_cache = TTLCache("roles", CACHE_MAX_ENTRIES, ROLE_CACHE_TTL_SECONDS)
+
+# Verified payloads of tokens, keyed by their digest, each expiring with its token
+token_cache = TTLCache("tokens", CACHE_MAX_ENTRIES, ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+# Payloads of the tokens seen by the current request, keyed by token
+request_tokens: ContextVar[Optional[dict]] = ContextVar("request_tokens", default=None)
+
 # Create Hash Password
-def get_password_hash(password: str) -> str:
-    "Hash a plain text password using bcrypt."
+async def get_password_hash(password: str) -> str:
+    "Hash a plain text password using bcrypt, on the password hashing pool."
     logger.info("Hashing password.")
-    return pwd_context.hash(password)
+    return await password_hash_pool.run(pwd_context.hash, password)
 
 # Verify Hash Password
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    "Verify if the plain password matches the hashed password."
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    "Verify if the plain password matches the hashed password, on the password hashing pool."
     logger.info("Verifying password.")
-    return pwd_context.verify(plain_password, hashed_password)
+    return await password_hash_pool.run(pwd_context.verify, plain_password, hashed_password)
+
+# Check if Hash Password is Outdated
+def password_needs_rehash(hashed_password: str) -> bool:
+    "Check if a hashed password uses another scheme or cost than the configured ones."
+    return pwd_context.needs_update(hashed_password)
 
 # Create Access & Refresh Token
-async def get_user_token(id: int, refresh_token: str = None) -> TokenResponse:
-    "Generate access and refresh tokens for a user."
+async def get_user_token(id: int, role: str, is_active: bool, role_at: Optional[int] = None) -> TokenResponse:
+    """
+    Generate access and refresh tokens for a user, both carrying their role and active flag.
+    `role_at` is when these were read from the database, now unless they come from a refresh token.
+    """
     logger.info(f"Generating tokens for user ID {id}.")
-    payload = {"id": id}
+    payload = {"id": id, "role": role, "is_active": is_active, "role_at": role_at or int(time.time())}
     access_token_expiry = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = await create_access_token(payload, access_token_expiry)
-
-    if not refresh_token:
-        refresh_token = await create_refresh_token(payload)
+    refresh_token = await create_refresh_token(payload)
 
     logger.info(f"Tokens generated successfully for user ID {id}.")
     return TokenResponse(
@@ -60,8 +91,8 @@ async def create_access_token(data: dict, access_token_expiry: timedelta) -> str
     "Create a JWT access token for a given payload."
     logger.info("Creating access token.")
     payload = data.copy()
-    expire = datetime.now(timezone.utc) + access_token_expiry
-    payload.update({"exp": expire})
+    issued_at = datetime.now(timezone.utc)
+    payload.update({"type": "access", "iat": issued_at, "exp": issued_at + access_token_expiry})
 
     token = jwt.encode(payload, SECRET_KEY, algorithm=ALGORITHM)
     logger.info("Access token created successfully.")
@@ -69,19 +100,63 @@ async def create_access_token(data: dict, access_token_expiry: timedelta) -> str
 
 # Create Refresh Token
 async def create_refresh_token(data: dict) -> str:
-    "Create a JWT refresh token for a given payload."
+    "Create a single use JWT refresh token for a given payload, identified by a random `jti`."
     logger.info("Creating refresh token.")
-    return jwt.encode(data, SECRET_KEY, ALGORITHM)
+    payload = data.copy()
+    issued_at = datetime.now(timezone.utc)
+    payload.update({"type": "refresh", "jti": uuid.uuid4().hex, "iat": issued_at,
+                    "exp": issued_at + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)})
+    return jwt.encode(payload, SECRET_KEY, ALGORITHM)
 
 # Get Payload Of Token
-def get_token_payload(token: str) -> dict:
-    "Decode and return the payload of a JWT token if valid else, raises `JWTError`"
-    try:
-        logger.info("Decoding token payload.")
-        return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-    except JWTError:
-        logger.error("Failed to decode token: Invalid token.")
-        raise ResponseHandler.invalid_credentials("Invalid access token")
+def get_token_payload(token: str, token_type: str = "access") -> dict:
+    "Decode and return the payload of a JWT token of `token_type` if valid else, raises `JWTError`"
+    memo = request_tokens.get()
+    if memo is not None and token in memo:
+        return check_token_type(memo[token], token_type)
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is MISSING:
+        try:
+            logger.info("Decoding token payload.")
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        except JWTError:
+            logger.error("Failed to decode token: Invalid token.")
+            raise ResponseHandler.invalid_credentials(f"Invalid {token_type} token")
+        # Tokens issued without an expiry are rejected by `check_token_type`, and never cached
+        if "exp" in payload:
+            token_cache.set(key, payload, payload["exp"] - time.time())
+    if memo is not None:
+        memo[token] = payload
+    return check_token_type(payload, token_type)
+
+# Check Type of Token
+def check_token_type(payload: dict, token_type: str) -> dict:
+    """
+    Return the payload of a token if it is of `token_type`. Tokens issued without a type or an expiry
+    (the refresh tokens of earlier versions, which never expire) are rejected.
+    """
+    if payload.get("type") != token_type or "exp" not in payload:
+        logger.error(f"Failed to decode token: Not an {token_type} token.")
+        raise ResponseHandler.invalid_credentials(f"Invalid {token_type} token")
+    return payload
+
+# Memoize Tokens per Request
+class TokenMemoMiddleware:
+    "ASGI middleware giving every request its own memo of token payloads, so each token is decoded at most once per request."
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        reset_token = request_tokens.set({})
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            request_tokens.reset(reset_token)
 
 # Get Current User from Token
 def get_current_user(token: HTTPAuthorizationCredentials) -> int:
@@ -90,24 +165,45 @@ def get_current_user(token: HTTPAuthorizationCredentials) -> int:
     user = get_token_payload(token.credentials)
     return user.get('id')
 
+# Cache the Role of a User
+def cache_user_role(user_id: int, user: Optional[User]) -> None:
+    "Cache the current role and active flag of a user, or that they were deleted when `user` is `None`."
+    role_cache.set(user_id, None if user is None else (user.role, user.is_active))
+
+# Get the Role of a User
+async def get_user_role(user_id: int, payload: dict) -> Optional[tuple]:
+    "Return the role and active flag of a user, from the cache or the claims of a recent token, else from the database."
+    claims = role_cache.get(user_id)
+    if claims is not MISSING:
+        return claims
+    if "role" in payload and time.time() - payload.get("role_at", payload.get("iat", 0)) <= ROLE_CACHE_TTL_SECONDS:
+        return payload["role"], payload.get("is_active", True)
+    logger.info(f"Role claims of user ID {user_id} are stale, looking the user up.")
+    db = await open_session()
+    try:
+        user = await db.scalar(select(User)
+                               .filter(User.id == user_id))
+    finally:
+        await db.close()
+    cache_user_role(user_id, user)
+    return role_cache.get(user_id)
+
 # Check if User has Admin Role
-def check_admin_role(
-        token: HTTPAuthorizationCredentials = Depends(auth_scheme),
-        db: Session = Depends(get_db)) -> None:
+async def check_admin_role(
+        token: HTTPAuthorizationCredentials = Depends(auth_scheme)) -> None:
     "Verify if the user associated with the token has an admin role."
     logger.info("Checking admin role for user.")
-    user = get_token_payload(token.credentials)
-    user_id = user.get('id')
-    role_user = (db.query(User)
-                 .filter(User.id == user_id)
-                 .first())
+    payload = get_token_payload(token.credentials)
+    user_id = payload.get('id')
+    claims = await get_user_role(user_id, payload)
 
-    if role_user is None:
+    if claims is None:
         logger.error(f"User ID {user_id} not found.")
         raise ResponseHandler.not_found_error(f"User with id {user_id}")
 
-    if role_user.role != "admin":
+    role, is_active = claims
+    if role != "admin" or not is_active:
         logger.error(f"User ID {user_id} does not have admin role.")
         raise ResponseHandler.restricted_access()
     
-    logger.info(f"User ID {user_id} has admin role.")
\ No newline at end of file
+    logger.info(f"User ID {user_id} has admin role.")
@@ -8,10 +8,57 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+def asyncpg_url(url: str) -> str:
+    "Rewrites a psycopg2 database URL for the asyncpg driver."
+    return (url or "").replace("postgresql://", "postgresql+asyncpg://", 1).replace("sslmode=", "ssl=")
+
 # Database variables
 DB_URL = os.getenv("DB_URL")
+DB_MODE = os.getenv("DB_MODE", "sync")  # Default: sync (`sync` or `async`)
+ASYNC_DB_URL = os.getenv("ASYNC_DB_URL", asyncpg_url(DB_URL))  # Default: DB_URL with the asyncpg driver
+
+# Read replica variables
+DB_REPLICA_URL = os.getenv("DB_REPLICA_URL")  # Default: None (reads use the primary)
+ASYNC_DB_REPLICA_URL = os.getenv("ASYNC_DB_REPLICA_URL", asyncpg_url(DB_REPLICA_URL))  # Default: DB_REPLICA_URL with the asyncpg driver
+DB_REPLICA_STICKY_SECONDS = float(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))  # Default: 5 seconds of reads on the primary after a write
+
+# Connection pool variables (applied per engine, per worker)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 5))  # Default: 5
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))  # Default: 10
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", 30))  # Default: 30 seconds
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", -1))  # Default: -1 (never recycle)
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "false").lower() == "true"  # Default: false
+
+# Catalog cache variables (per worker)
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 1024))  # Default: 1024 entries per cache
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", 60))  # Default: 60 seconds
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # Default: memory (`memory` per worker or `redis` shared, for listing pages)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")  # Default: local Redis server
+
+# HTTP caching variables
+CATALOG_MAX_AGE = int(os.getenv("CATALOG_MAX_AGE", 60))  # Default: 60 seconds of client and CDN caching for catalog reads
+CATALOG_VERSION_TTL_SECONDS = float(os.getenv("CATALOG_VERSION_TTL_SECONDS", 1))  # Default: 1 second a worker may miss writes made by the others
+
+# Response compression variables
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", 1024))  # Default: 1024 bytes, smaller responses are sent as is
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", 6))  # Default: 6 (1 fastest to 9 smallest)
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 4))  # Default: 4 (0 fastest to 11 smallest)
+COMPRESSION_CONTENT_TYPES = os.getenv("COMPRESSION_CONTENT_TYPES", "application/json,text/html,text/plain,text/css,application/javascript").split(",")  # Default: JSON, HTML, text, CSS and JavaScript
+
+# Password hashing variables (per worker)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", 4))  # Default: 4 passwords hashed concurrently
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", 12))  # Default: 12 (each extra round doubles the cost of a login)
+
+# Login throttling variables (per worker)
+LOGIN_USERNAME_BURST = int(os.getenv("LOGIN_USERNAME_BURST", 5))  # Default: 5 attempts at once per username
+LOGIN_USERNAME_PER_MINUTE = float(os.getenv("LOGIN_USERNAME_PER_MINUTE", 5))  # Default: 5 attempts per minute per username
+LOGIN_IP_BURST = int(os.getenv("LOGIN_IP_BURST", 20))  # Default: 20 attempts at once per client IP
+LOGIN_IP_PER_MINUTE = float(os.getenv("LOGIN_IP_PER_MINUTE", 20))  # Default: 20 attempts per minute per client IP
 
 # JWT variables
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", 1))  # Default: 1
 ALGORITHM = os.getenv("ALGORITHM", "HS256")  # Default: HS256
 SECRET_KEY = os.getenv("SECRET_KEY")
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", 7))  # Default: 7
+REVOKED_TOKENS_PURGE_SECONDS = float(os.getenv("REVOKED_TOKENS_PURGE_SECONDS", 3600))  # Default: 1 hour between purges of the expired revocations
+ROLE_CACHE_TTL_SECONDS = float(os.getenv("ROLE_CACHE_TTL_SECONDS", 60))  # Default: 60 seconds a demoted or deactivated admin may keep access
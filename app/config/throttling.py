@@ -0,0 +1,74 @@
+"""
+This module throttles login attempts, each of which costs a full bcrypt verification.
+
+Attempts are limited per username and per client IP by token buckets kept in the memory of the worker:
+a bucket holds up to `burst` attempts and refills at a steady rate. An attempt exceeding either limit is
+rejected with a 429 and a `Retry-After` header before the password is hashed or the database queried.
+Behind a proxy, the client IP is only right when the server trusts its forwarded headers
+(e.g. `uvicorn --proxy-headers`).
+"""
+
+import math
+import time
+from .logging import logger
+from .responses import ResponseHandler
+from .settings import CACHE_MAX_ENTRIES, LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE, LOGIN_USERNAME_BURST, LOGIN_USERNAME_PER_MINUTE
+from app.schemas import CustomOAuth2PasswordRequestForm
+from collections import OrderedDict
+from fastapi import Depends, Request
+from typing import Hashable
+
+
+class TokenBucketLimiter:
+    """
+    Token buckets of up to `burst` tokens refilled at `per_minute` tokens per minute, one per key.
+    Only the `max_keys` most recently used keys are tracked, a bucket evicted for being idle is full anyway.
+
+    Methods:
+        `retry_after(key)`: Returns the seconds until the bucket of `key` holds a token, 0 if it holds one.
+        `take(key)`: Takes a token from the bucket of `key`.
+    """
+
+    def __init__(self, name: str, burst: int, per_minute: float, max_keys: int) -> None:
+        self.name = name
+        self.burst = burst
+        self.rate = per_minute / 60
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+
+    def _refill(self, key: Hashable) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self.buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+        self.buckets[key] = (tokens, now)
+        self.buckets.move_to_end(key)
+        while len(self.buckets) > self.max_keys:
+            self.buckets.popitem(last=False)
+        return tokens
+
+    def retry_after(self, key: Hashable) -> float:
+        tokens = self._refill(key)
+        if tokens >= 1:
+            return 0
+        return (1 - tokens) / self.rate if self.rate > 0 else math.inf
+
+    def take(self, key: Hashable) -> None:
+        tokens, updated_at = self.buckets[key]
+        self.buckets[key] = (tokens - 1, updated_at)
+
+
+# Login attempts, per username and per client IP
+username_limiter = TokenBucketLimiter("login_username", LOGIN_USERNAME_BURST, LOGIN_USERNAME_PER_MINUTE, CACHE_MAX_ENTRIES)
+ip_limiter = TokenBucketLimiter("login_ip", LOGIN_IP_BURST, LOGIN_IP_PER_MINUTE, CACHE_MAX_ENTRIES)
+
+
+def throttle_login(request: Request, user_credentials: CustomOAuth2PasswordRequestForm = Depends()) -> None:
+    "Dependency taking a login attempt from the buckets of its username and client IP, or raising a 429 if either is empty."
+    username = user_credentials.username
+    client_ip = request.client.host if request.client else None
+    retry_after = max(username_limiter.retry_after(username), ip_limiter.retry_after(client_ip))
+    if retry_after > 0:
+        logger.error(f"Login throttled for username {username} from {client_ip}.")
+        ResponseHandler.too_many_requests(math.ceil(min(retry_after, 86400)))
+    username_limiter.take(username)
+    ip_limiter.take(client_ip)
@@ -3,13 +3,17 @@ App > Database
 ============
 This package contains modules for database interactions, including:
 - Database connection and session management.
+- Connection pool instrumentation.
+- Read replica routing.
 - SQLAlchemy ORM models for database tables.
 """
 
-from .database import Base, get_db
-from .models import User, Cart, CartItem, Category, Product
+from .database import Base, get_db, get_async_db, get_session, get_read_session, open_session, primary_session, get_engine_pools, ThreadedSession
+from .pool import get_pool_stats
+from .models import User, Cart, CartItem, Category, Product, CatalogVersion, RevokedToken
 
 __all__ = [
-    "Base", "get_db",
-    "User", "Cart", "CartItem", "Category", "Product"
+    "Base", "get_db", "get_async_db", "get_session", "get_read_session", "open_session", "primary_session", "get_engine_pools", "ThreadedSession",
+    "get_pool_stats",
+    "User", "Cart", "CartItem", "Category", "Product", "CatalogVersion", "RevokedToken"
 ]
@@ -1,22 +1,63 @@
 """
 This module handles database connectivity and session management using SQLAlchemy.
+
+The engine used by the API is selected with the `DB_MODE` setting:
+- `sync`: the blocking psycopg2 engine, with every round trip offloaded to the threadpool.
+- `async`: the asyncpg engine, awaited directly on the event loop.
+
+When `DB_REPLICA_URL` is set, read-only routes are served by a replica through `get_read_session`.
+Reads that fill a cache go to the primary through `primary_session`, so a lagging replica never pins
+stale rows in a cache for its whole time to live.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
 from app.config.logging import logger
-from app.config.settings import DB_URL # Do not import from init, circular dependency
+from app.config.settings import ( # Do not import from init, circular dependency
+    DB_URL, DB_MODE, ASYNC_DB_URL, DB_REPLICA_URL, ASYNC_DB_REPLICA_URL, DB_REPLICA_STICKY_SECONDS,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, DB_POOL_TIMEOUT, DB_POOL_RECYCLE, DB_POOL_PRE_PING
+)
+from .pool import MeteredAsyncAdaptedQueuePool, MeteredQueuePool
+from .routing import SAFE_METHODS, StickyWriters, get_client_key
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from typing import Generator
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from typing import Any, AsyncGenerator, Generator, Optional
+
+# Connection pool tuning shared by every engine
+POOL_OPTIONS = {
+    "pool_size": DB_POOL_SIZE,
+    "max_overflow": DB_MAX_OVERFLOW,
+    "pool_timeout": DB_POOL_TIMEOUT,
+    "pool_recycle": DB_POOL_RECYCLE,
+    "pool_pre_ping": DB_POOL_PRE_PING,
+}
 
 # Establish a connection to the PostgreSQL database
-engine = create_engine(DB_URL)
+engine = create_engine(DB_URL, poolclass=MeteredQueuePool, **POOL_OPTIONS)
+
+# The async engine needs the asyncpg driver, so it is only built when selected
+async_engine = (create_async_engine(ASYNC_DB_URL, poolclass=MeteredAsyncAdaptedQueuePool, **POOL_OPTIONS)
+                if DB_MODE == "async" else None)
+
+# Optional read replica, reads fall back to the primary when it is not configured
+replica_engine = (create_engine(DB_REPLICA_URL, poolclass=MeteredQueuePool, **POOL_OPTIONS)
+                  if DB_REPLICA_URL else None)
+async_replica_engine = (create_async_engine(ASYNC_DB_REPLICA_URL, poolclass=MeteredAsyncAdaptedQueuePool, **POOL_OPTIONS)
+                        if DB_REPLICA_URL and DB_MODE == "async" else None)
+sticky_writers = StickyWriters(DB_REPLICA_STICKY_SECONDS)
 
 # Create database tables based on the defined SQLAlchemy models (subclasses of the Base class)
 Base = declarative_base()
 
 # Connect to the database and provide a session for interacting with it
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=async_engine)
+ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+AsyncReplicaSessionLocal = async_sessionmaker(autoflush=False, expire_on_commit=False, bind=async_replica_engine)
 
 def get_db() -> Generator:
     "Provides a session for interacting with the database."
@@ -30,3 +71,161 @@ def get_db() -> Generator:
     finally:
         db.close()
         logger.info("Database session closed.")
+
+
+async def get_async_db() -> AsyncGenerator:
+    "Provides an `AsyncSession` for interacting with the database without blocking the event loop."
+    try:
+        db = AsyncSessionLocal()
+        logger.info("Async database session started.")
+        yield db
+    except Exception as e:
+        logger.exception("An error occurred while interacting with the database.")
+        raise e
+    finally:
+        await db.close()
+        logger.info("Async database session closed.")
+
+
+class ThreadedSession:
+    """
+    Exposes a blocking `Session` through the awaitable interface of `AsyncSession`.
+    Every method that may hit the database runs on the threadpool, so services can be written
+    once against `AsyncSession` and still be served by the sync engine.
+
+    A session keeps its pooled connection across several threadpool hops, so sessions are only opened
+    within `limiter`, sized to the pool capacity. Otherwise every worker thread could end up blocked on
+    a checkout while the sessions owning the connections wait for a free thread.
+    """
+
+    def __init__(self, sync_session: Session, limiter: Optional[asyncio.Semaphore] = None) -> None:
+        self.sync_session = sync_session
+        self.limiter = limiter
+
+    @property
+    def info(self) -> dict:
+        return self.sync_session.info
+
+    def add(self, instance: Any) -> None:
+        self.sync_session.add(instance)
+
+    def add_all(self, instances: Any) -> None:
+        self.sync_session.add_all(instances)
+
+    async def execute(self, *args, **kwargs) -> Any:
+        return await run_in_threadpool(self.sync_session.execute, *args, **kwargs)
+
+    async def scalar(self, *args, **kwargs) -> Any:
+        return await run_in_threadpool(self.sync_session.scalar, *args, **kwargs)
+
+    async def scalars(self, *args, **kwargs) -> Any:
+        return await run_in_threadpool(self.sync_session.scalars, *args, **kwargs)
+
+    async def get(self, *args, **kwargs) -> Any:
+        return await run_in_threadpool(self.sync_session.get, *args, **kwargs)
+
+    async def delete(self, instance: Any) -> None:
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self) -> None:
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def commit(self) -> None:
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self) -> None:
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def refresh(self, *args, **kwargs) -> None:
+        await run_in_threadpool(self.sync_session.refresh, *args, **kwargs)
+
+    async def close(self) -> None:
+        try:
+            await run_in_threadpool(self.sync_session.close)
+        finally:
+            if self.limiter is not None:
+                self.limiter.release()
+                self.limiter = None
+
+    @classmethod
+    async def open(cls, session_factory: sessionmaker, limiter: Optional[asyncio.Semaphore]) -> "ThreadedSession":
+        "Waits for a free slot in `limiter`, then opens a session from `session_factory`."
+        if limiter is not None:
+            await limiter.acquire()
+        return cls(session_factory(), limiter)
+
+
+# Bounds the threaded sessions open at once on each engine to its pool capacity
+POOL_CAPACITY = DB_POOL_SIZE + DB_MAX_OVERFLOW if DB_MAX_OVERFLOW >= 0 else None
+primary_limiter = asyncio.Semaphore(POOL_CAPACITY) if POOL_CAPACITY else None
+replica_limiter = asyncio.Semaphore(POOL_CAPACITY) if POOL_CAPACITY else None
+
+
+async def open_session(replica: bool = False) -> Any:
+    "Opens a session for the selected `DB_MODE`, both variants share the `AsyncSession` interface."
+    if DB_MODE == "async":
+        db = AsyncReplicaSessionLocal() if replica else AsyncSessionLocal()
+    elif replica:
+        db = await ThreadedSession.open(ReplicaSessionLocal, replica_limiter)
+    else:
+        db = await ThreadedSession.open(SessionLocal, primary_limiter)
+    db.info["replica"] = replica
+    return db
+
+
+@asynccontextmanager
+async def primary_session(db: Any) -> AsyncGenerator:
+    "Provides `db` if it is on the primary, or else a session opened on the primary for the block."
+    if not db.info.get("replica"):
+        yield db
+        return
+    primary = await open_session()
+    try:
+        yield primary
+    finally:
+        await primary.close()
+
+
+async def get_session(request: Request) -> AsyncGenerator:
+    "Provides a session on the primary database, pinning writing clients to it for a short window."
+    client_key = get_client_key(request)
+    if client_key and request.method not in SAFE_METHODS:
+        sticky_writers.mark(client_key)
+    try:
+        db = await open_session()
+        logger.info("Database session started.")
+        yield db
+    except Exception as e:
+        logger.exception("An error occurred while interacting with the database.")
+        raise e
+    finally:
+        await db.close()
+        logger.info("Database session closed.")
+
+
+async def get_read_session(request: Request) -> AsyncGenerator:
+    "Provides a session on the read replica, or on the primary if there is none or the client wrote recently."
+    client_key = get_client_key(request)
+    replica = replica_engine is not None and not (client_key and sticky_writers.is_sticky(client_key))
+    try:
+        db = await open_session(replica)
+        logger.info(f"Database session started on the {'replica' if replica else 'primary'}.")
+        yield db
+    except Exception as e:
+        logger.exception("An error occurred while interacting with the database.")
+        raise e
+    finally:
+        await db.close()
+        logger.info("Database session closed.")
+
+
+def get_engine_pools() -> dict:
+    "Returns the connection pool of every engine in use, keyed by a readable name."
+    pools = {"primary": engine.pool}
+    if async_engine is not None:
+        pools["primary_async"] = async_engine.pool
+    if replica_engine is not None:
+        pools["replica"] = replica_engine.pool
+    if async_replica_engine is not None:
+        pools["replica_async"] = async_replica_engine.pool
+    return pools
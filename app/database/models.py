@@ -2,14 +2,18 @@
 models.py
 =========
 This module defines the SQLAlchemy ORM models for the application's database tables.
-Models: User, Cart, CartItem, Category, Product.
+Models: User, Cart, CartItem, Category, Product, CatalogVersion, RevokedToken.
 """
 
 from .database import Base
-from sqlalchemy import Boolean, Column, Integer, String, ForeignKey, Float, ARRAY, Enum
+from sqlalchemy import BigInteger, Boolean, Column, Computed, Integer, String, ForeignKey, Float, ARRAY, Enum, Index, Sequence
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.sql.expression import text
 from sqlalchemy.sql.sqltypes import TIMESTAMP
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, query_expression, relationship
+
+# Text search document of a product, matches on the title rank above matches on the description
+PRODUCT_SEARCH_VECTOR = "setweight(to_tsvector('english', title), 'A') || setweight(to_tsvector('english', description), 'B')"
 
 
 class User(Base):
@@ -17,7 +21,7 @@ class User(Base):
     Represents a user in the system.
 
     Attributes:
-    - `id` (int): Primary key, unique identifier for the user.
+    - `id` (int): Primary key, unique identifier for the user, allocated from a sequence starting at 500.
     - `username` (str): Unique username of the user.
     - `email` (str): Unique email address of the user.
     - `password` (str): Hashed password of the user.
@@ -31,17 +35,17 @@ class User(Base):
     """
     __tablename__ = "users"
 
-    id = Column(Integer, primary_key=True, nullable=False, unique=True, autoincrement=True)
+    id = Column(Integer, Sequence("users_id_seq", start=500, minvalue=500, maxvalue=599), primary_key=True, nullable=False, unique=True, autoincrement=True)
     username = Column(String, unique=True, nullable=False)
     email = Column(String, unique=True, nullable=False)
     password = Column(String, nullable=False)
     full_name = Column(String, nullable=False)
     is_active = Column(Boolean, server_default="True", nullable=False)
-    role = Column(Enum("admin", "user", name="user_roles"), nullable=False, server_default="user")
-    created_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+    role = Column(Enum("admin", "user", name="user_roles"), nullable=False, server_default="user", index=True)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False, index=True)
 
     # Relationships
-    carts = relationship("Cart", back_populates="user")
+    carts = relationship("Cart", back_populates="user", cascade="all", passive_deletes=True)
 
 
 class Cart(Base):
@@ -49,7 +53,7 @@ class Cart(Base):
     Represents a shopping cart for a user.
 
     Attributes:
-    - `id` (int): Primary key, unique identifier for the cart.
+    - `id` (int): Primary key, unique identifier for the cart, allocated from a sequence starting at 300.
     - `user_id` (int): Foreign key referencing the User model.
     - `created_at` (datetime): Timestamp of cart creation.
     - `total_amount` (float): Total amount of the cart.
@@ -60,14 +64,14 @@ class Cart(Base):
     """
     __tablename__ = "carts"
 
-    id = Column(Integer, primary_key=True, nullable=False, unique=True, autoincrement=True)
-    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
-    created_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+    id = Column(Integer, Sequence("carts_id_seq", start=300, minvalue=300, maxvalue=399), primary_key=True, nullable=False, unique=True, autoincrement=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False, index=True)
     total_amount = Column(Float, nullable=False)
 
     # Relationships
     user = relationship("User", back_populates="carts")
-    cart_items = relationship("CartItem", back_populates="cart")
+    cart_items = relationship("CartItem", back_populates="cart", cascade="all", passive_deletes=True)
 
 
 class CartItem(Base):
@@ -88,8 +92,8 @@ class CartItem(Base):
     __tablename__ = "cart_items"
 
     id = Column(Integer, primary_key=True, nullable=False, unique=True, autoincrement=True)
-    cart_id = Column(Integer, ForeignKey("carts.id", ondelete="CASCADE"), nullable=False)
-    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    cart_id = Column(Integer, ForeignKey("carts.id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
     quantity = Column(Integer, nullable=False)
     subtotal = Column(Float, nullable=False)
 
@@ -103,7 +107,7 @@ class Category(Base):
     Represents a product category.
 
     Attributes:
-    - `id` (int): Primary key, unique identifier for the category.
+    - `id` (int): Primary key, unique identifier for the category, allocated from a sequence starting at 100.
     - `name` (str): Name of the category.
     
     Relationships:
@@ -111,11 +115,11 @@ class Category(Base):
     """
     __tablename__ = "categories"
 
-    id = Column(Integer, primary_key=True, nullable=False, unique=True, autoincrement=True)
+    id = Column(Integer, Sequence("categories_id_seq", start=100, minvalue=100, maxvalue=199), primary_key=True, nullable=False, unique=True, autoincrement=True)
     name = Column(String, unique=True, nullable=False)
 
     # Relationships
-    products = relationship("Product", back_populates="category")
+    products = relationship("Product", back_populates="category", cascade="all", passive_deletes=True)
 
 
 class Product(Base):
@@ -123,7 +127,7 @@ class Product(Base):
     Represents a product available for purchase.
 
     Attributes:
-    - `id` (int): Primary key, unique identifier for the product.
+    - `id` (int): Primary key, unique identifier for the product, allocated from a sequence starting at 200.
     - `title` (str): Title of the product.
     - `description` (str): Description of the product.
     - `price` (int): Price of the product in the smallest currency unit (e.g., cents).
@@ -136,14 +140,24 @@ class Product(Base):
     - `is_published` (bool): Indicates if the product is published.
     - `created_at` (datetime): Timestamp of product creation.
     - `category_id` (int): Foreign key referencing the Category model.
+    - `search_vector` (tsvector): Generated text search document of the title and description, GIN indexed.
+    - `search_rank` (float): Relevance to the search query, only set on search results.
     
     Relationships:
     - `category`: Many-to-one relationship with the Category model.
     - `cart_items`: One-to-many relationship with the CartItem model.
     """
     __tablename__ = "products"
-
-    id = Column(Integer, primary_key=True, nullable=False, unique=True, autoincrement=True)
+    __table_args__ = (
+        Index("ix_products_search_vector", "search_vector", postgresql_using="gin"),
+        # Sort orders of the listings, for the whole catalog and within a category
+        *(Index(f"ix_products_{column}_id", column, "id")
+          for column in ("price", "rating", "created_at", "discount_percentage")),
+        *(Index(f"ix_products_category_id_{column}_id", "category_id", column, "id")
+          for column in ("price", "rating", "created_at", "discount_percentage")),
+    )
+
+    id = Column(Integer, Sequence("products_id_seq", start=200, minvalue=200, maxvalue=299), primary_key=True, nullable=False, unique=True, autoincrement=True)
     title = Column(String, nullable=False)
     description = Column(String, nullable=False)
     price = Column(Integer, nullable=False)
@@ -156,7 +170,45 @@ class Product(Base):
     is_published = Column(Boolean, server_default="True", nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
 
+    # Full-text search, the document is only read by the database
+    search_vector = deferred(Column(TSVECTOR, Computed(PRODUCT_SEARCH_VECTOR, persisted=True), nullable=False))
+    search_rank = query_expression()
+
     # Relationships
     category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
     category = relationship("Category", back_populates="products")
-    cart_items = relationship("CartItem", back_populates="product")
+    cart_items = relationship("CartItem", back_populates="product", cascade="all", passive_deletes=True)
+
+
+class CatalogVersion(Base):
+    """
+    Represents the version of a catalog table, bumped by a database trigger on every statement writing to it.
+
+    Attributes:
+    - `name` (str): Primary key, name of the versioned table (`products` or `categories`).
+    - `version` (int): Number of write statements run on the table.
+    - `updated_at` (datetime): Timestamp of the last write to the table.
+    """
+    __tablename__ = "catalog_versions"
+
+    name = Column(String, primary_key=True, nullable=False)
+    version = Column(BigInteger, server_default="0", nullable=False)
+    updated_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
+
+
+class RevokedToken(Base):
+    """
+    Represents a revoked refresh token, kept until the token expires.
+
+    Attributes:
+    - `jti` (str): Primary key, unique identifier of the revoked token.
+    - `user_id` (int): ID of the user the token was issued to.
+    - `expires_at` (datetime): Expiry of the token, after which the row can be purged.
+    - `revoked_at` (datetime): Timestamp of the revocation.
+    """
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String, primary_key=True, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    expires_at = Column(TIMESTAMP(timezone=True), nullable=False, index=True)
+    revoked_at = Column(TIMESTAMP(timezone=True), server_default=text("NOW()"), nullable=False)
@@ -0,0 +1,86 @@
+"""
+This module instruments the SQLAlchemy connection pools so their usage can be inspected at runtime.
+Each pool records how long every checkout waited for a connection in a fixed-bucket histogram.
+"""
+
+import time
+from app.config.settings import DB_MAX_OVERFLOW # Do not import from init, circular dependency
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from threading import Lock
+
+# Upper bounds (in seconds) of the checkout wait-time histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, float("inf"))
+
+
+class WaitHistogram:
+    """
+    Thread-safe histogram of connection checkout wait times.
+
+    Methods:
+        `observe(seconds)`: Records a single checkout wait.
+        `snapshot()`: Returns the bucket counts, total count, total and maximum wait.
+    """
+
+    def __init__(self) -> None:
+        self._lock = Lock()
+        self._counts = [0] * len(WAIT_BUCKETS)
+        self._total = 0.0
+        self._max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        "Records a single checkout wait."
+        index = next(i for i, bound in enumerate(WAIT_BUCKETS) if seconds <= bound)
+        with self._lock:
+            self._counts[index] += 1
+            self._total += seconds
+            self._max = max(self._max, seconds)
+
+    def snapshot(self) -> dict:
+        "Returns the bucket counts, total count, total and maximum wait."
+        with self._lock:
+            counts = list(self._counts)
+            total, maximum = self._total, self._max
+        return {
+            "buckets": {("+Inf" if bound == float("inf") else str(bound)): count
+                        for bound, count in zip(WAIT_BUCKETS, counts)},
+            "count": sum(counts),
+            "total_seconds": total,
+            "max_seconds": maximum,
+        }
+
+
+class MeteredPoolMixin:
+    "Times every connection checkout and records it in the pool's `wait_histogram`."
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_histogram = WaitHistogram()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            self.wait_histogram.observe(time.perf_counter() - start)
+
+
+class MeteredQueuePool(MeteredPoolMixin, QueuePool):
+    "`QueuePool` for the sync engine with checkout wait-time metrics."
+
+
+class MeteredAsyncAdaptedQueuePool(MeteredPoolMixin, AsyncAdaptedQueuePool):
+    "`AsyncAdaptedQueuePool` for the async engine with checkout wait-time metrics."
+
+
+def get_pool_stats(name: str, pool: QueuePool) -> dict:
+    "Returns the current occupancy and checkout wait-time histogram of a pool."
+    return {
+        "name": name,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        # Every engine is built with the configured overflow, the pool keeps it private
+        "max_overflow": DB_MAX_OVERFLOW,
+        "wait_time": pool.wait_histogram.snapshot(),
+    }
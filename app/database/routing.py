@@ -0,0 +1,55 @@
+"""
+This module decides which database serves a request when a read replica is configured.
+
+Reads go to the replica, except for clients that wrote recently: those are pinned to the primary
+for a short window so they always read their own writes despite replication lag.
+Clients are identified by a digest of their `Authorization` header.
+"""
+
+import hashlib
+import time
+from starlette.requests import Request
+from threading import Lock
+from typing import Optional
+
+# Requests with these methods never write
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+def get_client_key(request: Request) -> Optional[str]:
+    "Returns a digest identifying the credentials of the request, if any."
+    authorization = request.headers.get("authorization")
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode()).hexdigest()
+
+
+class StickyWriters:
+    """
+    Remembers clients that wrote recently, so their reads can be pinned to the primary.
+    Entries live in the memory of the worker and expire after `window` seconds.
+
+    Methods:
+        `mark(key)`: Pins the client to the primary for the next `window` seconds.
+        `is_sticky(key)`: Returns whether the client is still pinned to the primary.
+    """
+
+    def __init__(self, window: float) -> None:
+        self.window = window
+        self._lock = Lock()
+        self._expiries = {}
+
+    def mark(self, key: str) -> None:
+        "Pins the client to the primary for the next `window` seconds."
+        now = time.monotonic()
+        with self._lock:
+            self._expiries[key] = now + self.window
+            # Drop expired entries now and then so the map stays bounded by the active writers
+            if len(self._expiries) > 1024:
+                self._expiries = {k: expiry for k, expiry in self._expiries.items() if expiry > now}
+
+    def is_sticky(self, key: str) -> bool:
+        "Returns whether the client is still pinned to the primary."
+        with self._lock:
+            expiry = self._expiries.get(key)
+        return expiry is not None and expiry > time.monotonic()
@@ -4,8 +4,11 @@ Key functionality includes routers for authentication, accounts, products, and m
 Customizes the Swagger UI with syntax highlighting and additional features.
 """
 
-from app.routers import home_router, auth_router, accounts_router, categories_router, products_router, carts_router, users_router
+from app.routers import home_router, auth_router, accounts_router, categories_router, products_router, carts_router, users_router, metrics_router
+from app.config import CompressionMiddleware, TokenMemoMiddleware, database_error_handler
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from sqlalchemy.exc import DBAPIError
 
 description = """
 Welcome to the Mock E-Commerce API! 🚀
@@ -32,6 +35,7 @@ For any inquiries, please contact sshah@watermelon.us
 app = FastAPI(
     description=description,
     title="E-Commerce API",
+    default_response_class=ORJSONResponse,
     version="2.0.4",
     contact={
         "name": "Sahil Shah",
@@ -46,6 +50,10 @@ app = FastAPI(
     },
 )
 
+app.add_middleware(TokenMemoMiddleware)
+app.add_middleware(CompressionMiddleware)
+app.add_exception_handler(DBAPIError, database_error_handler)
+
 app.include_router(home_router)
 app.include_router(auth_router)
 app.include_router(accounts_router)
@@ -53,3 +61,4 @@ app.include_router(categories_router)
 app.include_router(products_router)
 app.include_router(carts_router)
 app.include_router(users_router)
+app.include_router(metrics_router)
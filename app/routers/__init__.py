@@ -3,7 +3,7 @@ App > Routers
 =============
 This module imports and consolidates all router definitions for the e-commerce API.
 Each router corresponds to a specific section of the application, such as authentication, products, users, etc.
-Routers: accounts_router, auth_router, carts_router, categories_router, home_router, products_router, users_router
+Routers: accounts_router, auth_router, carts_router, categories_router, home_router, products_router, users_router, metrics_router
 """
 
 from .home import router as home_router
@@ -13,6 +13,7 @@ from .categories import router as categories_router
 from .products import router as products_router
 from .carts import router as carts_router
 from .users import router as users_router
+from .metrics import router as metrics_router
 
 __all__ = [
     "home_router",
@@ -22,4 +23,5 @@ __all__ = [
     "products_router",
     "carts_router",
     "users_router",
+    "metrics_router",
 ]
\ No newline at end of file
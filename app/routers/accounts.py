@@ -4,12 +4,12 @@ Secured with authentication.
 """
 
 from app.config import auth_scheme
-from app.database import get_db
+from app.database import get_read_session, get_session
 from app.schemas import AccountUpdate, AccountOut
 from app.services import AccountService
 from fastapi import APIRouter, Depends, status
 from fastapi.security.http import HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(tags=["Account"], prefix="/me")
 
@@ -19,12 +19,12 @@ router = APIRouter(tags=["Account"], prefix="/me")
     response_model=AccountOut,
     summary="Get My Info #",
     description="This endpoint uses the authorization credentials to retrieve detailed information about the user.")
-def get_my_info(
-        db: Session = Depends(get_db),
+async def get_my_info(
+        db: AsyncSession = Depends(get_read_session),
         token: HTTPAuthorizationCredentials = Depends(auth_scheme)
     ) -> AccountOut:
     "Fetch information about the current user."
-    return AccountService.get_my_info(db, token)
+    return await AccountService.get_my_info(db, token)
 
 
 @router.put(
@@ -33,13 +33,13 @@ def get_my_info(
     response_model=AccountOut,
     summary="Edit My Info #",
     description="This endpoint allows the user to update their stored information.")
-def edit_my_info(
+async def edit_my_info(
         updated_user: AccountUpdate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_session),
         token: HTTPAuthorizationCredentials = Depends(auth_scheme)
     ) -> AccountOut:
     "Edit the current user's information."
-    return AccountService.edit_my_info(db, token, updated_user)
+    return await AccountService.edit_my_info(db, token, updated_user)
 
 
 @router.delete(
@@ -48,9 +48,9 @@ def edit_my_info(
     response_model=AccountOut,
     summary="Delete My Info #",
     description="This endpoint allows the user to delete their account permanently.")
-def remove_my_account(
-        db: Session = Depends(get_db),
+async def remove_my_account(
+        db: AsyncSession = Depends(get_session),
         token: HTTPAuthorizationCredentials = Depends(auth_scheme)
     ) -> AccountOut:
     "Remove the current user's account."
-    return AccountService.remove_my_account(db, token)
+    return await AccountService.remove_my_account(db, token)
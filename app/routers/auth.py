@@ -2,14 +2,20 @@
 This module contains routes related to user authentication, including signing up a new user, logging in an existing user, and refreshing the access token using a refresh token.
 """
 
-from app.database import get_db
-from app.schemas import TokenResponse, UserCreate, UserOut, CustomOAuth2PasswordRequestForm
+from app.config import load_revoked_tokens, throttle_login
+from app.database import get_session
+from app.schemas import TokenResponse, LogoutResponse, UserCreate, UserOut, CustomOAuth2PasswordRequestForm
 from app.services import AuthService
 from fastapi import APIRouter, Depends, status, Header
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter(tags=["Auth"], prefix="/auth")
 
+@router.on_event("startup")
+async def load_revocations() -> None:
+    "Loads the revoked refresh tokens before the first request."
+    await load_revoked_tokens()
+
 @router.post(
     "/signup",
     status_code=status.HTTP_201_CREATED,
@@ -18,7 +24,7 @@ router = APIRouter(tags=["Auth"], prefix="/auth")
     description="This endpoint allows a user to create a new account by providing the necessary details.")
 async def user_signup(
         user: UserCreate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_session)
     ) -> UserOut:
     "Sign up a new user."
     return await AuthService.signup(db, user)
@@ -28,11 +34,12 @@ async def user_signup(
     "/login",
     status_code=status.HTTP_200_OK,
     response_model=TokenResponse,
+    dependencies=[Depends(throttle_login)],
     summary="User Login",
-    description="This endpoint allows an existing user to log in using their credentials and receive an access token.")
+    description="This endpoint allows an existing user to log in using their credentials and receive an access token. Attempts are throttled per username and per client IP.")
 async def user_login(
         user_credentials: CustomOAuth2PasswordRequestForm = Depends(),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_session)
     ) -> TokenResponse:
     "Login an existing user."
     return await AuthService.login(user_credentials, db)
@@ -43,10 +50,24 @@ async def user_login(
     status_code=status.HTTP_200_OK,
     response_model=TokenResponse,
     summary="Refresh Access Token #",
-    description="This endpoint allows the user to refresh their access token using a valid refresh token.")
+    description="This endpoint allows the user to refresh their access token using a valid refresh token. Refresh tokens are single use, a new one is returned with the access token.")
 async def refresh_access_token(
         refresh_token: str = Header("{{refreshToken}}"),
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_session)
     ) -> TokenResponse:
     "Refresh the user's access token."
     return await AuthService.get_refresh_token(token=refresh_token, db=db)
+
+
+@router.post(
+    "/logout",
+    status_code=status.HTTP_200_OK,
+    response_model=LogoutResponse,
+    summary="Logout #",
+    description="This endpoint revokes a refresh token, so it cannot be used to refresh the access token anymore.")
+async def logout(
+        refresh_token: str = Header("{{refreshToken}}"),
+        db: AsyncSession = Depends(get_session)
+    ) -> LogoutResponse:
+    "Revoke the user's refresh token."
+    return await AuthService.logout(token=refresh_token, db=db)
@@ -2,13 +2,14 @@
 This module contains routes for managing carts, including retrieving all carts, creating a new cart, updating an existing cart, and deleting a cart. The endpoints support authentication through a token.
 """
 
-from app.config import auth_scheme
-from app.database import get_db
-from app.schemas import CartCreate, CartUpdate, CartOut, CartOutDelete, CartsOut
+from app.config import JSONBytesResponse, auth_scheme, dump_json, json_response, parse_fields, sparse_model
+from app.database import get_read_session, get_session
+from app.schemas import CartBase, CartCreate, CartUpdate, CartOut, CartOutDelete, CartsOut, CartLeanOut, CartsLeanOut
 from app.services import CartService
 from fastapi import APIRouter, Depends, Query, status
 from fastapi.security.http import HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Literal, Union
 
 
 router = APIRouter(tags=["Carts"], prefix="/carts")
@@ -17,17 +18,22 @@ router = APIRouter(tags=["Carts"], prefix="/carts")
 @router.get(
     "/",
     status_code=status.HTTP_200_OK,
-    response_model=CartsOut,
+    response_model=Union[CartsLeanOut, CartsOut],
     summary="Get All Carts #",
-    description="This endpoint retrieves a paginated list of all carts for the particular user.")
-def get_all_carts(
-        db: Session = Depends(get_db),
-        page: int = Query("<integer>*", ge=1, description="Page number (Required)"),
+    description="This endpoint retrieves a paginated list of all carts for the particular user, optionally limited to some fields. The products of the items are side-loaded once each in `products`, unless `expand=product` embeds them in every item.")
+async def get_all_carts(
+        db: AsyncSession = Depends(get_read_session),
+        page: int = Query(1, ge=1, description="Page number, ignored when `after` is given (Optional)"),
         limit: int = Query("<integer>*", ge=1, le=100, description="Items per page (Required)"),
+        after: str = Query(None, description="Cursor returned as `next_cursor` by the previous page (Optional)"),
+        fields: str = Query(None, description="Comma-separated fields to return, `id` is always included (Optional)"),
+        expand: Literal["product"] = Query(None, description="`product` embeds the product of every item instead of side-loading them (Optional)"),
         token: HTTPAuthorizationCredentials = Depends(auth_scheme)
-    ) -> CartsOut:
+    ) -> JSONBytesResponse:
     "Retrieve all carts with pagination."
-    return CartService.get_all_carts(token, db, page, limit)
+    fields = parse_fields(fields, CartBase)
+    schema = sparse_model(CartsOut if expand else CartsLeanOut, fields)
+    return json_response(dump_json(schema, await CartService.get_all_carts(token, db, page, limit, after, fields, bool(expand))))
 
 
 @router.post(
@@ -36,28 +42,32 @@ def get_all_carts(
     response_model=CartOut,
     summary="Create New Cart #",
     description="This endpoint creates a new cart for the user.")
-def create_cart(
+async def create_cart(
         cart: CartCreate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_session),
         token: HTTPAuthorizationCredentials = Depends(auth_scheme)
     ) -> CartOut:
     "Create a new cart."
-    return CartService.create_cart(token, db, cart)
+    return await CartService.create_cart(token, db, cart)
 
 
 @router.get(
     "/{cart_id}",
     status_code=status.HTTP_200_OK,
-    response_model=CartOut,
+    response_model=Union[CartLeanOut, CartOut],
     summary="Get Specific Cart #",
-    description="This endpoint retrieves a specific cart by its ID.")
-def get_cart(
+    description="This endpoint retrieves a specific cart by its ID, optionally limited to some fields. The products of the items are side-loaded once each in `products`, unless `expand=product` embeds them in every item.")
+async def get_cart(
         cart_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_read_session),
+        fields: str = Query(None, description="Comma-separated fields to return, `id` is always included (Optional)"),
+        expand: Literal["product"] = Query(None, description="`product` embeds the product of every item instead of side-loading them (Optional)"),
         token: HTTPAuthorizationCredentials = Depends(auth_scheme)
-    ) -> CartOut:
+    ) -> JSONBytesResponse:
     "Retrieve a specific cart by its ID."
-    return CartService.get_cart(token, db, cart_id)
+    fields = parse_fields(fields, CartBase)
+    schema = sparse_model(CartOut if expand else CartLeanOut, fields)
+    return json_response(dump_json(schema, await CartService.get_cart(token, db, cart_id, fields, bool(expand))))
 
 
 @router.put(
@@ -66,14 +76,14 @@ def get_cart(
     response_model=CartOut,
     summary="Update Existing Cart #",
     description="This endpoint updates an existing cart by its ID.")
-def update_cart(
+async def update_cart(
         cart_id: int,
         updated_cart: CartUpdate,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_session),
         token: HTTPAuthorizationCredentials = Depends(auth_scheme)
     ) -> CartOut:
     "Update an existing cart."
-    return CartService.update_cart(token, db, cart_id, updated_cart)
+    return await CartService.update_cart(token, db, cart_id, updated_cart)
 
 
 @router.delete(
@@ -82,10 +92,10 @@ def update_cart(
     response_model=CartOutDelete,
     summary="Delete Existing Cart #",
     description="This endpoint deletes a cart by its ID.")
-def delete_cart(
+async def delete_cart(
         cart_id: int,
-        db: Session = Depends(get_db),
+        db: AsyncSession = Depends(get_session),
         token: HTTPAuthorizationCredentials = Depends(auth_scheme)
     ) -> CartOutDelete:
     "Delete a cart by its ID."
-    return CartService.delete_cart(token, db, cart_id)
+    return await CartService.delete_cart(token, db, cart_id)
@@ -2,12 +2,12 @@
 This module contains routes for managing categories, including retrieving all categories, creating a new category, updating an existing category, and deleting a category. Some endpoints are restricted to admins.
 """
 
-from app.config import check_admin_role
-from app.database import get_db
-from app.schemas import CategoryCreate, CategoryOut, CategoriesOut, CategoryOutDelete, CategoryUpdate
+from app.config import JSONBytesResponse, check_admin_role, category_validators, dump_json, json_response, parse_fields, sparse_model
+from app.database import get_read_session, get_session
+from app.schemas import CategoryBase, CategoryCreate, CategoryOut, CategoriesOut, CategoryOutDelete, CategoryUpdate
 from app.services import CategoryService
-from fastapi import APIRouter, Depends, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 router = APIRouter(tags=["Categories"], prefix="/categories")
@@ -18,15 +18,20 @@ router = APIRouter(tags=["Categories"], prefix="/categories")
     status_code=status.HTTP_200_OK,
     response_model=CategoriesOut,
     summary="Get All Categories",
-    description="This endpoint retrieves a paginated list of all categories with an optional search parameter to filter by category name.")
-def get_all_categories(
-        db: Session = Depends(get_db),
-        page: int = Query("<integer>*", ge=1, description="Page number (Required)"),
+    description="This endpoint retrieves a paginated list of all categories with an optional search parameter to filter by category name, and optional sparse fieldsets.")
+async def get_all_categories(
+        response: Response,
+        version: int = Depends(category_validators),
+        db: AsyncSession = Depends(get_read_session),
+        page: int = Query(1, ge=1, description="Page number, ignored when `after` is given (Optional)"),
         limit: int = Query("<integer>*", ge=1, le=100, description="Items per page (Required)"),
+        after: str = Query(None, description="Cursor returned as `next_cursor` by the previous page (Optional)"),
         search: str = Query("{{searchQuery}}", description="Search based name of categories (Optional)"),
-    ) -> CategoriesOut:
+        fields: str = Query(None, description="Comma-separated fields to return, `id` is always included (Optional)"),
+    ) -> JSONBytesResponse:
     "Retrieve all categories with pagination and optional search by name."
-    return CategoryService.get_all_categories(db, page, limit, search)
+    fields = parse_fields(fields, CategoryBase)
+    return json_response(await CategoryService.get_all_categories(db, version, page, limit, search, after, fields), response)
 
 
 @router.post(
@@ -36,12 +41,12 @@ def get_all_categories(
     dependencies=[Depends(check_admin_role)],
     summary="Create New Category ##",
     description="This endpoint allows an admin to create a new category.")
-def create_category(
+async def create_category(
         category: CategoryCreate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_session)
     ) -> CategoryOut:
     "Create a new category."
-    return CategoryService.create_category(db, category)
+    return await CategoryService.create_category(db, category)
 
 
 @router.get(
@@ -49,13 +54,17 @@ def create_category(
     status_code=status.HTTP_200_OK,
     response_model=CategoryOut,
     summary="Get Specific Category",
-    description="This endpoint retrieves a specific category by its ID.")
-def get_category(
+    description="This endpoint retrieves a specific category by its ID, optionally limited to some fields.")
+async def get_category(
         category_id: int,
-        db: Session = Depends(get_db)
-    ) -> CategoryOut:
+        response: Response,
+        version: int = Depends(category_validators),
+        db: AsyncSession = Depends(get_read_session),
+        fields: str = Query(None, description="Comma-separated fields to return, `id` is always included (Optional)"),
+    ) -> JSONBytesResponse:
     "Retrieve a specific category by its ID."
-    return CategoryService.get_category(db, category_id)
+    fields = parse_fields(fields, CategoryBase)
+    return json_response(dump_json(sparse_model(CategoryOut, fields), await CategoryService.get_category(db, version, category_id)), response)
 
 
 @router.put(
@@ -65,13 +74,13 @@ def get_category(
     dependencies=[Depends(check_admin_role)],
     summary="Update Existing Category ##",
     description="This endpoint allows an admin to update an existing category by its ID.")
-def update_category(
+async def update_category(
         category_id: int,
         updated_category: CategoryUpdate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_session)
     ) -> CategoryOut:
     "Update an existing category by its ID."
-    return CategoryService.update_category(db, category_id, updated_category)
+    return await CategoryService.update_category(db, category_id, updated_category)
 
 
 @router.delete(
@@ -81,9 +90,9 @@ def update_category(
     dependencies=[Depends(check_admin_role)],
     summary="Delete Existing Category ##",
     description="This endpoint allows an admin to delete a category by its ID.")
-def delete_category(
+async def delete_category(
         category_id: int,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_session)
     ) -> CategoryOutDelete:
     "Delete a category by its ID."
-    return CategoryService.delete_category(db, category_id)
+    return await CategoryService.delete_category(db, category_id)
@@ -1,15 +1,29 @@
 """
 This module serves the home page with the README.md content and provides a download link 
 for the API in PM Collection/Swagger Specification format as well as a WM Environment (`E-Commerce Files.zip`).
+The home page is rendered and compressed at startup, and again only when `README.md` is modified.
+The JSON files of the download are also served one by one, compressed once at startup.
 """
 
+import html
 import os
-from fastapi import APIRouter, status
+from app.config import logger, PrecompressedBody
+from fastapi import APIRouter, Request, Response, status
 from fastapi.responses import HTMLResponse, FileResponse
 from markdown_it import MarkdownIt
+from typing import Optional
 
 router = APIRouter(tags=["Home"])
 DOCS_FILENAME = "E-Commerce Files.zip"
+FILES_DIRECTORY = "files"
+README_FILENAME = "README.md"
+markdown = MarkdownIt().enable("table")
+
+# Rendered home page, along with the modification time of the README it was rendered from
+home_page = {"mtime": None, "body": None}
+
+# JSON files of the files directory (OpenAPI specification, PM collection and WM environment), by name
+json_files = {}
 
 def html_page(content: str) -> str:
     return f"""
@@ -39,23 +53,54 @@ def html_page(content: str) -> str:
     </html>
     """
 
-@router.get("/", response_class=HTMLResponse, include_in_schema=False)
-async def read_homepage() -> HTMLResponse:
-    "Converts the markdown content from `README.md` and display it on the front page"
+def render_homepage() -> Optional[PrecompressedBody]:
+    "Returns the rendered home page, rendering it again if `README.md` was modified since, or `None` if it is missing."
     try:
-        with open("README.md", "r", encoding="utf-8") as f:
-            readme_content = f.read()
-        markdown = MarkdownIt().enable("table")
-        html_content = markdown.render(readme_content)
-        return HTMLResponse(content=html_page(html_content),
-                            status_code=status.HTTP_200_OK)
+        mtime = os.stat(README_FILENAME).st_mtime_ns
+        if home_page["mtime"] != mtime:
+            with open(README_FILENAME, "r", encoding="utf-8") as f:
+                readme_content = f.read()
+            html_content = markdown.render(readme_content)
+            home_page.update(mtime=mtime, body=PrecompressedBody(html_page(html_content).encode(), "text/html"))
+            logger.info(f"Rendered the home page from '{README_FILENAME}'.")
+        return home_page["body"]
+    except FileNotFoundError:
+        return None
+
+def precompress_files() -> None:
+    "Loads and compresses the JSON files of the files directory, if it exists."
+    try:
+        filenames = os.listdir(FILES_DIRECTORY)
     except FileNotFoundError:
-        return HTMLResponse(content="File 'README.md' not found",
+        return
+    for filename in filenames:
+        if filename.endswith(".json"):
+            with open(os.path.join(FILES_DIRECTORY, filename), "rb") as f:
+                json_files[filename] = PrecompressedBody(f.read(), "application/json")
+    logger.info(f"Compressed {len(json_files)} files from '{FILES_DIRECTORY}'.")
+
+@router.on_event("startup")
+async def prerender_homepage() -> None:
+    "Renders the home page before the first request."
+    render_homepage()
+
+@router.on_event("startup")
+async def prepare_files() -> None:
+    "Compresses the JSON files before the first request."
+    precompress_files()
+
+@router.get("/", response_class=HTMLResponse, include_in_schema=False)
+async def read_homepage(request: Request) -> HTMLResponse:
+    "Serves the home page rendered from the markdown content of `README.md`, compressed if the client accepts it"
+    body = render_homepage()
+    if body is None:
+        return HTMLResponse(content=f"File '{README_FILENAME}' not found",
                             status_code=status.HTTP_404_NOT_FOUND)
+    return body.response(request, {"Cache-Control": "no-cache"})
 
 @router.get("/download", include_in_schema=False)
 async def download_file():
-    file_path = os.path.join("files", DOCS_FILENAME)
+    file_path = os.path.join(FILES_DIRECTORY, DOCS_FILENAME)
     try:
         return FileResponse(path=file_path,
                             filename=DOCS_FILENAME,
@@ -63,3 +108,12 @@ async def download_file():
     except FileNotFoundError:
         return HTMLResponse(content=f"File '{DOCS_FILENAME}' not found",
                             status_code=status.HTTP_404_NOT_FOUND)
+
+@router.get("/files/{filename}", include_in_schema=False)
+async def read_file(request: Request, filename: str) -> Response:
+    "Serves a JSON file of the files directory, compressed if the client accepts it"
+    body = json_files.get(filename)
+    if body is None:
+        return HTMLResponse(content=f"File '{html.escape(filename)}' not found",
+                            status_code=status.HTTP_404_NOT_FOUND)
+    return body.response(request, {"Cache-Control": "no-cache"})
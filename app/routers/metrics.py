@@ -0,0 +1,56 @@
+"""
+This module defines API routes exposing runtime metrics of the serving worker.
+All metrics are restricted to admins.
+"""
+
+from app.config import check_admin_role
+from app.schemas import CacheStatsOut, CoalescingStatsOut, PasswordHashStatsOut, PoolStatsOut
+from app.services import MetricsService
+from fastapi import APIRouter, Depends, status
+
+
+router = APIRouter(tags=["Metrics"], prefix="/metrics", dependencies=[Depends(check_admin_role)])
+
+
+@router.get(
+    "/db-pool",
+    status_code=status.HTTP_200_OK,
+    response_model=PoolStatsOut,
+    summary="Get Database Pool Statistics ##",
+    description="This endpoint reports checked-out, idle and overflow connections as well as checkout wait times for each database pool of the worker serving the request.")
+async def get_pool_stats() -> PoolStatsOut:
+    "Retrieve database connection pool statistics."
+    return await MetricsService.get_pool_stats()
+
+
+@router.get(
+    "/cache",
+    status_code=status.HTTP_200_OK,
+    response_model=CacheStatsOut,
+    summary="Get Cache Statistics ##",
+    description="This endpoint reports the size and the hit, miss, eviction, expiration and invalidation counters of each in-process cache of the worker serving the request.")
+async def get_cache_stats() -> CacheStatsOut:
+    "Retrieve in-process cache statistics."
+    return await MetricsService.get_cache_stats()
+
+
+@router.get(
+    "/coalescing",
+    status_code=status.HTTP_200_OK,
+    response_model=CoalescingStatsOut,
+    summary="Get Request Coalescing Statistics ##",
+    description="This endpoint reports the reads in flight, and per key the reads run and the concurrent identical requests collapsed into them, for the worker serving the request.")
+async def get_coalescing_stats() -> CoalescingStatsOut:
+    "Retrieve request coalescing statistics."
+    return await MetricsService.get_coalescing_stats()
+
+
+@router.get(
+    "/password-hashing",
+    status_code=status.HTTP_200_OK,
+    response_model=PasswordHashStatsOut,
+    summary="Get Password Hashing Statistics ##",
+    description="This endpoint reports the queued, running and completed jobs and the queue wait times of the password hashing pool of the worker serving the request.")
+async def get_password_hash_stats() -> PasswordHashStatsOut:
+    "Retrieve password hashing pool statistics."
+    return await MetricsService.get_password_hash_stats()
@@ -3,12 +3,13 @@ This module defines the API routes for managing products, including retrieving,
 The routes support pagination, searching, and role-based access control.
 """
 
-from app.config import check_admin_role
-from app.database import get_db
-from app.schemas import ProductCreate, ProductOut, ProductsOut, ProductOutDelete, ProductUpdate
+from app.config import JSONBytesResponse, check_admin_role, dump_json, json_response, parse_fields, product_validators, sparse_model
+from app.database import get_read_session, get_session
+from app.schemas import ProductBase, ProductCreate, ProductFilters, ProductOut, ProductsOut, ProductOutDelete, ProductUpdate
 from app.services import ProductService
-from fastapi import APIRouter, Depends, Query, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, Query, Response, status
+from typing import Literal
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 router = APIRouter(tags=["Products"], prefix="/products")
@@ -19,15 +20,30 @@ router = APIRouter(tags=["Products"], prefix="/products")
     status_code=status.HTTP_200_OK,
     response_model=ProductsOut,
     summary="Get All Products",
-    description="This endpoint retrieves all products with pagination (required) and search by title (optional).")
-def get_all_products(
-        db: Session = Depends(get_db),
-        page: int = Query("<integer>*", ge=1, description="Page number (Required)"),
+    description="This endpoint retrieves all products with pagination (page or cursor), full-text search ranked by relevance (optional), filters (optional), sorting (optional) and sparse fieldsets (optional).")
+async def get_all_products(
+        response: Response,
+        version: int = Depends(product_validators),
+        db: AsyncSession = Depends(get_read_session),
+        page: int = Query(1, ge=1, description="Page number, ignored when `after` is given (Optional)"),
         limit: int = Query("<integer>*", ge=1, le=100, description="Items per page (Required)"),
-        search: str = Query("{{searchQuery}}", description="Search based title of products"),
-    ) -> ProductsOut:
-    "Retrieve all products with pagination and optional search by title."
-    return ProductService.get_all_products(db, page, limit, search)
+        after: str = Query(None, description="Cursor returned as `next_cursor` by the previous page (Optional)"),
+        search: str = Query("{{searchQuery}}", description="Search the title and description of products, most relevant first"),
+        category_id: int = Query(None, description="Filter by category (Optional)"),
+        brand: str = Query(None, min_length=1, description="Filter by brand (Optional)"),
+        min_price: int = Query(None, ge=0, description="Minimum price (Optional)"),
+        max_price: int = Query(None, ge=0, description="Maximum price (Optional)"),
+        min_rating: float = Query(None, ge=0, le=5, description="Minimum rating (Optional)"),
+        is_published: bool = Query(None, description="Filter by published status (Optional)"),
+        in_stock: bool = Query(None, description="Only products in stock, or out of stock (Optional)"),
+        sort: Literal["price", "-price", "rating", "newest", "discount"] = Query(None, description="Sort by `price`, `-price`, `rating`, `newest` or `discount` (Optional)"),
+        fields: str = Query(None, description="Comma-separated fields to return, `id` is always included (Optional)"),
+    ) -> JSONBytesResponse:
+    "Retrieve all products with pagination, and optional full-text search, filters, sorting and sparse fieldsets."
+    filters = ProductFilters(category_id=category_id, brand=brand, min_price=min_price, max_price=max_price,
+                             min_rating=min_rating, is_published=is_published, in_stock=in_stock, sort=sort)
+    fields = parse_fields(fields, ProductBase)
+    return json_response(await ProductService.get_all_products(db, version, page, limit, search, after, filters, fields), response)
 
 
 @router.post(
@@ -37,12 +53,12 @@ def get_all_products(
     dependencies=[Depends(check_admin_role)],
     summary="Create New Product ##",
     description="This endpoint allows an admin to create a new product.")
-def create_product(
+async def create_product(
         product: ProductCreate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_session)
     ) -> ProductOut:
     "Create a new product."
-    return ProductService.create_product(db, product)
+    return await ProductService.create_product(db, product)
 
 
 @router.get(
@@ -50,13 +66,18 @@ def create_product(
     status_code=status.HTTP_200_OK, 
     response_model=ProductOut,
     summary="Get Specific Product",
-    description="This endpoint retrieves a specific product by its ID.")
-def get_product(
+    description="This endpoint retrieves a specific product by its ID, optionally limited to some fields.")
+async def get_product(
         product_id: int,
-        db: Session = Depends(get_db)
-    ) -> ProductOut:
+        response: Response,
+        version: int = Depends(product_validators),
+        db: AsyncSession = Depends(get_read_session),
+        fields: str = Query(None, description="Comma-separated fields to return, `id` is always included (Optional)"),
+    ) -> JSONBytesResponse:
     "Retrieve a specific product by its ID."
-    return ProductService.get_product(db, product_id)
+    fields = parse_fields(fields, ProductBase)
+    # The product cache holds whole products, only the payload is trimmed
+    return json_response(dump_json(sparse_model(ProductOut, fields), await ProductService.get_product(db, version, product_id)), response)
 
 
 @router.put(
@@ -66,13 +87,13 @@ def get_product(
     dependencies=[Depends(check_admin_role)],
     summary="Update Existing Product ##",
     description="This endpoint allows an admin to update an existing product by its ID.")
-def update_product(
+async def update_product(
         product_id: int,
         updated_product: ProductUpdate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_session)
     ) -> ProductOut:
     "Update an existing product by its ID."
-    return ProductService.update_product(db, product_id, updated_product)
+    return await ProductService.update_product(db, product_id, updated_product)
 
 
 @router.delete(
@@ -82,9 +103,9 @@ def update_product(
     dependencies=[Depends(check_admin_role)],
     summary="Delete Existing Category ##",
     description="This endpoint allows an admin to delete an existing product by its ID.")
-def delete_product(
+async def delete_product(
         product_id: int,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_session)
     ) -> ProductOutDelete:
     "Delete a product by its ID."
-    return ProductService.delete_product(db, product_id)
+    return await ProductService.delete_product(db, product_id)
@@ -4,11 +4,11 @@ It also supports pagination, search, and role-based filtering. All user-related
 """
 
 from app.config import check_admin_role
-from app.database import get_db
+from app.database import get_session
 from app.schemas import UserCreate, UserOut, UsersOut, UserOutDelete, UserUpdate
 from app.services import UserService
 from fastapi import APIRouter, Depends, Query, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 router = APIRouter(tags=["Users"], prefix="/users")
@@ -20,16 +20,17 @@ router = APIRouter(tags=["Users"], prefix="/users")
     response_model=UsersOut,
     dependencies=[Depends(check_admin_role)],
     summary="Get All Users ##",
-    description="This endpoint retrieves all users with pagination (required), search by username (optional), and role filtering (optional).")
-def get_all_users(
-        db: Session = Depends(get_db),
-        page: int = Query("<integer>*", ge=1, description="Page number (Required)"),
+    description="This endpoint retrieves all users with pagination (page or cursor), search by username (optional), and role filtering (optional).")
+async def get_all_users(
+        db: AsyncSession = Depends(get_session),
+        page: int = Query(1, ge=1, description="Page number, ignored when `after` is given (Optional)"),
         limit: int = Query("<integer>*", ge=1, le=100, description="Items per page (Required)"),
+        after: str = Query(None, description="Cursor returned as `next_cursor` by the previous page (Optional)"),
         search: str = Query("{{searchQuery}}", description="Search by username (Optional)"),
         role: str = Query("<string = `user`/`admin`/``", enum=["user", "admin", ""], description="Filter by user role (Optional)")
     ) -> UsersOut:
     "Retrieve all users with pagination, search, and role filtering."
-    return UserService.get_all_users(db, page, limit, search, role)
+    return await UserService.get_all_users(db, page, limit, search, role, after)
 
 
 @router.post(
@@ -39,12 +40,12 @@ def get_all_users(
     dependencies=[Depends(check_admin_role)],
     summary="Create New User ##",
     description="This endpoint allows an admin to create a new user.")
-def create_user(
+async def create_user(
         user: UserCreate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_session)
     ) -> UserOut:
     "Create a new user."
-    return UserService.create_user(db, user)
+    return await UserService.create_user(db, user)
 
 
 @router.get(
@@ -54,12 +55,12 @@ def create_user(
     dependencies=[Depends(check_admin_role)],
     summary="Get Specific User ##",
     description="This endpoint retrieves a specific user by their ID.")
-def get_user(
+async def get_user(
         user_id: int,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_session)
     ) -> UserOut:
     "Retrieve a specific user by their ID."
-    return UserService.get_user(db, user_id)
+    return await UserService.get_user(db, user_id)
 
 
 @router.put(
@@ -69,13 +70,13 @@ def get_user(
     dependencies=[Depends(check_admin_role)],
     summary="Update User by ID",
     description="This endpoint allows an admin to update an existing user by their ID.")
-def update_user(
+async def update_user(
         user_id: int,
         updated_user: UserUpdate,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_session)
     ) -> UserOut:
     "Update an existing user by their ID."
-    return UserService.update_user(db, user_id, updated_user)
+    return await UserService.update_user(db, user_id, updated_user)
 
 
 @router.delete(
@@ -85,9 +86,9 @@ def update_user(
     dependencies=[Depends(check_admin_role)],
     summary="Delete User by ID",
     description="This endpoint allows an admin to delete a user by their ID.")
-def delete_user(
+async def delete_user(
         user_id: int,
-        db: Session = Depends(get_db)
+        db: AsyncSession = Depends(get_session)
     ) -> UserOutDelete:
     "Delete a user by their ID."
-    return UserService.delete_user(db, user_id)
+    return await UserService.delete_user(db, user_id)
@@ -2,21 +2,23 @@
 App > Schemas
 =============
 This module aggregates the schemas used in the application, making them accessible for import in other parts of the app.
-Schemas include definitions for accounts, authentication, carts, categories, products, and users.
+Schemas include definitions for accounts, authentication, carts, categories, metrics, products, and users.
 """
 
 from .accounts import AccountUpdate, AccountOut
-from .auth import TokenResponse, CustomOAuth2PasswordRequestForm
-from .carts import CartCreate, CartUpdate, CartOutDelete, CartOut, CartsOut
-from .categories import CategoryCreate, CategoryUpdate, CategoryOutDelete, CategoryOut, CategoriesOut
-from .products import ProductCreate, ProductUpdate, ProductOutDelete, ProductOut, ProductsOut
+from .auth import TokenResponse, LogoutResponse, CustomOAuth2PasswordRequestForm
+from .carts import CartBase, CartCreate, CartUpdate, CartOutDelete, CartOut, CartsOut, CartLeanOut, CartsLeanOut
+from .categories import CategoryBase, CategoryCreate, CategoryUpdate, CategoryOutDelete, CategoryOut, CategoriesOut
+from .metrics import CacheStatsOut, CoalescingStatsOut, PasswordHashStatsOut, PoolStatsOut
+from .products import ProductBase, ProductCreate, ProductUpdate, ProductFilters, ProductOutDelete, ProductOut, ProductsOut
 from .users import UserCreate, UserUpdate, UserOutDelete, UserOut, UsersOut
 
 __all__ = [
     "AccountUpdate", "AccountOut",
-    "TokenResponse", "CustomOAuth2PasswordRequestForm",
-    "CartCreate", "CartUpdate", "CartOutDelete", "CartOut", "CartsOut",
-    "CategoryCreate", "CategoryUpdate", "CategoryOutDelete", "CategoryOut", "CategoriesOut",
-    "ProductCreate", "ProductUpdate", "ProductOutDelete", "ProductOut", "ProductsOut",
+    "TokenResponse", "LogoutResponse", "CustomOAuth2PasswordRequestForm",
+    "CartBase", "CartCreate", "CartUpdate", "CartOutDelete", "CartOut", "CartsOut", "CartLeanOut", "CartsLeanOut",
+    "CategoryBase", "CategoryCreate", "CategoryUpdate", "CategoryOutDelete", "CategoryOut", "CategoriesOut",
+    "CacheStatsOut", "CoalescingStatsOut", "PasswordHashStatsOut", "PoolStatsOut",
+    "ProductBase", "ProductCreate", "ProductUpdate", "ProductFilters", "ProductOutDelete", "ProductOut", "ProductsOut",
     "UserCreate", "UserUpdate", "UserOutDelete", "UserOut", "UsersOut"
 ]
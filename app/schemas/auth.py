@@ -22,6 +22,16 @@ class TokenResponse(CustomBaseModel):
     expire_in: int = Field(..., description="Time in seconds before the access token expires.")
 
 
+class LogoutResponse(CustomBaseModel):
+    """
+    Represents the schema for a logout response.
+
+    Attributes:
+    - `message` (str): Response message.
+    """
+    message: str = Field(..., description="Response message.")
+
+
 class CustomOAuth2PasswordRequestForm:
     """
     This class handles the OAuth2 password request form data. This form collects the user's username and password as part of the authentication process.
@@ -6,7 +6,7 @@ from .products import ProductBase
 from app.config import CustomBaseModel
 from datetime import datetime
 from pydantic import Field
-from typing import List
+from typing import Dict, List, Optional
 
 class CartItemBase(CustomBaseModel):
     """
@@ -75,9 +75,71 @@ class CartsOut(CustomBaseModel):
         - `created_at` (datetime): Timestamp when the cart was created.
         - `total_amount` (float): Total amount for the cart.
         - `cart_items` (List[CartItemBase]): List of items in the cart.
+    - `next_cursor` (str): Cursor of the next page, `None` on the last page.
     """
     message: str = Field(..., description="Response message.")
     data: List[CartBase] = Field(..., description="List of cart details.")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, pass it as `after` (None on the last page).")
+
+class CartItemLean(CustomBaseModel):
+    """
+    Represents a cart item, without the details of its product.
+
+    Attributes:
+    - `id` (int): Unique identifier for the cart item.
+    - `product_id` (int): Unique identifier for the product, its details are in the `products` of the response.
+    - `quantity` (int): Quantity of the product in the cart.
+    - `subtotal` (float): Subtotal amount for the cart item.
+    """
+    id: int = Field("<integer>", description="Unique identifier for the cart item.")
+    product_id: int = Field("<integer>", description="Unique identifier for the product, its details are in `products`.")
+    quantity: int = Field("<integer>", description="Quantity of the product in the cart.")
+    subtotal: float = Field("<float>", description="Subtotal amount for the cart item.")
+
+class CartLean(CartBase):
+    """
+    Represents basic cart details, with items referring to their products by ID.
+
+    Attributes:
+    - `id` (int): Unique identifier for the cart.
+    - `user_id` (int): Unique identifier for the user.
+    - `created_at` (datetime): Timestamp when the cart was created.
+    - `total_amount` (float): Total amount for the cart.
+    - `cart_items` (List[CartItemLean]): List of items in the cart.
+        - `id` (int): Unique identifier for the cart item.
+        - `product_id` (int): Unique identifier for the product.
+        - `quantity` (int): Quantity of the product in the cart.
+        - `subtotal` (float): Subtotal amount for the cart item.
+    """
+    cart_items: List[CartItemLean] = Field(..., description="List of items in the cart.")
+
+class CartLeanOut(CustomBaseModel):
+    """
+    Represents a single cart response, with the products of its items side-loaded.
+
+    Attributes:
+    - `message` (str): Response message.
+    - `data` (CartLean): Cart details, with items referring to their products by ID.
+    - `products` (Dict[int, ProductBase]): Details of the products in the cart, by ID.
+    """
+    message: str = Field(..., description="Response message.")
+    data: CartLean = Field(..., description="Cart details.")
+    products: Dict[int, ProductBase] = Field({}, description="Details of the products in the cart, by ID.")
+
+class CartsLeanOut(CustomBaseModel):
+    """
+    Represents a list of carts response, with the products of their items side-loaded once each.
+
+    Attributes:
+    - `message` (str): Response message.
+    - `data` (List[CartLean]): List of cart details, with items referring to their products by ID.
+    - `next_cursor` (str): Cursor of the next page, `None` on the last page.
+    - `products` (Dict[int, ProductBase]): Details of the products in the carts, by ID.
+    """
+    message: str = Field(..., description="Response message.")
+    data: List[CartLean] = Field(..., description="List of cart details.")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, pass it as `after` (None on the last page).")
+    products: Dict[int, ProductBase] = Field({}, description="Details of the products in the carts, by ID.")
 
 class CartOutDelete(CartOut):
     """
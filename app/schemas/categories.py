@@ -4,7 +4,7 @@ This module defines schemas for creating, updating, and outputting category deta
 
 from app.config import CustomBaseModel
 from pydantic import Field
-from typing import List
+from typing import List, Optional
 
 class CategoryCreate(CustomBaseModel):
     """
@@ -56,9 +56,11 @@ class CategoriesOut(CustomBaseModel):
     - `data` (List[CategoryBase]): List of category details.
         - `id` (int): Unique identifier for the category.
         - `name` (str): Name of the category.
+    - `next_cursor` (str): Cursor of the next page, `None` on the last page.
     """
     message: str = Field(..., description="Response message.")
     data: List[CategoryBase] = Field(..., description="List of category details.")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, pass it as `after` (None on the last page).")
 
 class CategoryOutDelete(CategoryOut):
     """
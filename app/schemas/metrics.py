@@ -0,0 +1,161 @@
+"""
+This module defines schemas for the runtime metrics exposed to admins.
+"""
+
+from app.config import CustomBaseModel
+from pydantic import Field
+from typing import Dict, List
+
+class WaitTimeHistogram(CustomBaseModel):
+    """
+    Represents a histogram of connection checkout wait times.
+
+    Attributes:
+    - `buckets` (Dict[str, int]): Number of checkouts per bucket, keyed by the bucket's upper bound in seconds.
+    - `count` (int): Total number of checkouts.
+    - `total_seconds` (float): Sum of all checkout waits in seconds.
+    - `max_seconds` (float): Longest checkout wait in seconds.
+    """
+    buckets: Dict[str, int] = Field(..., description="Number of checkouts per bucket, keyed by the bucket's upper bound in seconds.")
+    count: int = Field(..., description="Total number of checkouts.")
+    total_seconds: float = Field(..., description="Sum of all checkout waits in seconds.")
+    max_seconds: float = Field(..., description="Longest checkout wait in seconds.")
+
+class PoolStats(CustomBaseModel):
+    """
+    Represents the state of a database connection pool.
+
+    Attributes:
+    - `name` (str): Name of the engine owning the pool.
+    - `size` (int): Configured number of persistent connections.
+    - `checked_out` (int): Connections currently in use.
+    - `idle` (int): Connections currently idle in the pool.
+    - `overflow` (int): Connections currently open beyond the pool size.
+    - `max_overflow` (int): Configured maximum number of overflow connections.
+    - `wait_time` (WaitTimeHistogram): Histogram of connection checkout wait times.
+    """
+    name: str = Field(..., description="Name of the engine owning the pool.")
+    size: int = Field(..., description="Configured number of persistent connections.")
+    checked_out: int = Field(..., description="Connections currently in use.")
+    idle: int = Field(..., description="Connections currently idle in the pool.")
+    overflow: int = Field(..., description="Connections currently open beyond the pool size.")
+    max_overflow: int = Field(..., description="Configured maximum number of overflow connections.")
+    wait_time: WaitTimeHistogram = Field(..., description="Histogram of connection checkout wait times.")
+
+class PoolStatsOut(CustomBaseModel):
+    """
+    Represents the output schema for database pool statistics.
+
+    Attributes:
+    - `message` (str): Response message.
+    - `data` (List[PoolStats]): Statistics of every connection pool of this worker.
+    """
+    message: str = Field(..., description="Response message.")
+    data: List[PoolStats] = Field(..., description="Statistics of every connection pool of this worker.")
+
+class CacheStats(CustomBaseModel):
+    """
+    Represents the state and counters of an in-process cache.
+
+    Attributes:
+    - `name` (str): Name of the cache.
+    - `size` (int): Entries currently cached.
+    - `max_entries` (int): Configured maximum number of entries.
+    - `ttl_seconds` (float): Configured time to live of an entry in seconds.
+    - `hits` (int): Reads served from the cache.
+    - `misses` (int): Reads that found no live entry.
+    - `evictions` (int): Least recently used entries evicted to make room.
+    - `expirations` (int): Entries dropped after outliving their time to live.
+    - `invalidations` (int): Entries dropped by writes.
+    """
+    name: str = Field(..., description="Name of the cache.")
+    size: int = Field(..., description="Entries currently cached.")
+    max_entries: int = Field(..., description="Configured maximum number of entries.")
+    ttl_seconds: float = Field(..., description="Configured time to live of an entry in seconds.")
+    hits: int = Field(..., description="Reads served from the cache.")
+    misses: int = Field(..., description="Reads that found no live entry.")
+    evictions: int = Field(..., description="Least recently used entries evicted to make room.")
+    expirations: int = Field(..., description="Entries dropped after outliving their time to live.")
+    invalidations: int = Field(..., description="Entries dropped by writes.")
+
+class CacheStatsOut(CustomBaseModel):
+    """
+    Represents the output schema for cache statistics.
+
+    Attributes:
+    - `message` (str): Response message.
+    - `data` (List[CacheStats]): Statistics of every in-process cache of this worker.
+    """
+    message: str = Field(..., description="Response message.")
+    data: List[CacheStats] = Field(..., description="Statistics of every in-process cache of this worker.")
+
+class CoalescedKey(CustomBaseModel):
+    """
+    Represents the counters of a coalesced read.
+
+    Attributes:
+    - `key` (str): Normalized parameters of the read.
+    - `reads` (int): Reads run for this key.
+    - `collapsed` (int): Requests that shared a read in flight instead of running their own.
+    """
+    key: str = Field(..., description="Normalized parameters of the read.")
+    reads: int = Field(..., description="Reads run for this key.")
+    collapsed: int = Field(..., description="Requests that shared a read in flight instead of running their own.")
+
+class CoalescingStats(CustomBaseModel):
+    """
+    Represents the state and counters of a request coalescing layer.
+
+    Attributes:
+    - `name` (str): Name of the coalesced reads.
+    - `in_flight` (int): Reads currently in flight.
+    - `reads` (int): Reads run, over the tracked keys.
+    - `collapsed` (int): Requests collapsed into a read in flight, over the tracked keys.
+    - `keys` (List[CoalescedKey]): Counters of the most recently read keys, most recent first.
+    """
+    name: str = Field(..., description="Name of the coalesced reads.")
+    in_flight: int = Field(..., description="Reads currently in flight.")
+    reads: int = Field(..., description="Reads run, over the tracked keys.")
+    collapsed: int = Field(..., description="Requests collapsed into a read in flight, over the tracked keys.")
+    keys: List[CoalescedKey] = Field(..., description="Counters of the most recently read keys, most recent first.")
+
+class CoalescingStatsOut(CustomBaseModel):
+    """
+    Represents the output schema for request coalescing statistics.
+
+    Attributes:
+    - `message` (str): Response message.
+    - `data` (List[CoalescingStats]): Statistics of every coalescing layer of this worker.
+    """
+    message: str = Field(..., description="Response message.")
+    data: List[CoalescingStats] = Field(..., description="Statistics of every coalescing layer of this worker.")
+
+class PasswordHashStats(CustomBaseModel):
+    """
+    Represents the state of the password hashing pool.
+
+    Attributes:
+    - `workers` (int): Configured number of threads hashing passwords.
+    - `queued` (int): Jobs currently waiting for a thread.
+    - `running` (int): Jobs currently hashing.
+    - `completed` (int): Jobs completed.
+    - `max_queued` (int): Most jobs ever waiting for a thread at once.
+    - `wait_time` (WaitTimeHistogram): Histogram of the times jobs waited for a thread.
+    """
+    workers: int = Field(..., description="Configured number of threads hashing passwords.")
+    queued: int = Field(..., description="Jobs currently waiting for a thread.")
+    running: int = Field(..., description="Jobs currently hashing.")
+    completed: int = Field(..., description="Jobs completed.")
+    max_queued: int = Field(..., description="Most jobs ever waiting for a thread at once.")
+    wait_time: WaitTimeHistogram = Field(..., description="Histogram of the times jobs waited for a thread.")
+
+class PasswordHashStatsOut(CustomBaseModel):
+    """
+    Represents the output schema for password hashing statistics.
+
+    Attributes:
+    - `message` (str): Response message.
+    - `data` (PasswordHashStats): Statistics of the password hashing pool of this worker.
+    """
+    message: str = Field(..., description="Response message.")
+    data: PasswordHashStats = Field(..., description="Statistics of the password hashing pool of this worker.")
@@ -5,7 +5,7 @@ This module defines schemas for creating, updating, and outputting product detai
 from app.config import CustomBaseModel
 from datetime import datetime
 from pydantic import Field
-from typing import List
+from typing import List, Literal, Optional
 
 class ProductBase(CustomBaseModel):
     """
@@ -82,6 +82,30 @@ class ProductUpdate(ProductCreate):
     """
     pass
 
+class ProductFilters(CustomBaseModel):
+    """
+    Represents the filters and sort order of a product listing, every filter is optional.
+
+    Attributes:
+    - `category_id` (int): Only products of this category.
+    - `brand` (str): Only products of this brand.
+    - `min_price` (int): Only products priced at least this much.
+    - `max_price` (int): Only products priced at most this much.
+    - `min_rating` (float): Only products rated at least this much (0-5).
+    - `is_published` (bool): Only published or unpublished products.
+    - `in_stock` (bool): Only products in stock, or out of stock.
+    - `sort` (str): Sort order, `price`, `-price` (most expensive first), `rating` (best first),
+      `newest` or `discount` (largest first). Defaults to relevance when searching, otherwise to ID.
+    """
+    category_id: Optional[int] = Field(None, description="Only products of this category.")
+    brand: Optional[str] = Field(None, min_length=1, description="Only products of this brand.")
+    min_price: Optional[int] = Field(None, ge=0, description="Only products priced at least this much.")
+    max_price: Optional[int] = Field(None, ge=0, description="Only products priced at most this much.")
+    min_rating: Optional[float] = Field(None, ge=0, le=5, description="Only products rated at least this much (0-5).")
+    is_published: Optional[bool] = Field(None, description="Only published or unpublished products.")
+    in_stock: Optional[bool] = Field(None, description="Only products in stock, or out of stock.")
+    sort: Optional[Literal["price", "-price", "rating", "newest", "discount"]] = Field(None, description="Sort order of the products.")
+
 class ProductOut(CustomBaseModel):
     """
     Represents the output schema for a single product.
@@ -126,9 +150,11 @@ class ProductsOut(CustomBaseModel):
         - `is_published` (bool): Whether the product is published or not.
         - `created_at` (datetime): Timestamp when the product was created.
         - `category_id` (int): Unique identifier for the product's category.
+    - `next_cursor` (str): Cursor of the next page, `None` on the last page.
     """
     message: str = Field(..., description="Response message.")
     data: List[ProductBase] = Field(..., description="List of product details.")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, pass it as `after` (None on the last page).")
 
 class ProductOutDelete(ProductOut):
     """
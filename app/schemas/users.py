@@ -5,7 +5,7 @@ This module defines schemas for user attributes, updates, creation, and outputs.
 from .accounts import BaseAttributes, UpdateAttributes
 from app.config import CustomBaseModel
 from pydantic import EmailStr, Field
-from typing import List
+from typing import List, Optional
 
 class UserUpdate(UpdateAttributes):
     """
@@ -83,9 +83,11 @@ class UsersOut(CustomBaseModel):
         - `full_name` (str): Full name of the user.
         - `password` (str): Password of the user.
         - `email` (EmailStr): Email address of the user (validated).
+    - `next_cursor` (str): Cursor of the next page, `None` on the last page.
     """
     message: str = Field(..., description="Response message.")
     data: List[UserBase] = Field(..., description="List of user details.")
+    next_cursor: Optional[str] = Field(None, description="Cursor of the next page, pass it as `after` (None on the last page).")
 
 class UserOutDelete(UserOut):
     """
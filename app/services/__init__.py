@@ -1,7 +1,7 @@
 """
 App > Services
 ==============
-This package contains service classes for handling various actions in the application, such as user, product, category, and cart management.
+This package contains service classes for handling various actions in the application, such as user, product, category, and cart management, as well as runtime metrics.
 Service Classes: 
 """
 
@@ -9,6 +9,7 @@ from .accounts import AccountService
 from .auth import AuthService
 from .carts import CartService
 from .categories import CategoryService
+from .metrics import MetricsService
 from .products import ProductService
 from .users import UserService
 
@@ -17,6 +18,7 @@ __all__ = [
     "AuthService",
     "CartService",
     "CategoryService",
+    "MetricsService",
     "ProductService",
     "UserService"
 ]
\ No newline at end of file
@@ -3,9 +3,11 @@ This module provides the AccountService class for handling user account-related
 such as retrieving user information, editing user details, and deleting user accounts.
 """
 
-from app.config import logger, ResponseHandler, get_token_payload
+from .users import USER_CARTS_LOADER
+from app.config import logger, ResponseHandler, cache_user_role, get_token_payload
 from app.database import User
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 class AccountService:
     """
@@ -18,13 +20,13 @@ class AccountService:
     """
 
     @staticmethod
-    def get_my_info(db: Session, token: str) -> dict:
+    async def get_my_info(db: AsyncSession, token: str) -> dict:
         "Retrieve user's information."
         logger.info("Retrieving user info.")
         user_id = get_token_payload(token.credentials).get("id")
-        db_user = (db.query(User)
-                .filter(User.id == user_id)
-                .first())
+        db_user = await db.scalar(select(User)
+                                  .options(USER_CARTS_LOADER)
+                                  .filter(User.id == user_id))
 
         if not db_user:
             logger.error(f"User with id {user_id} not found.")
@@ -34,13 +36,12 @@ class AccountService:
         return ResponseHandler.get_single_success(db_user.username, db_user.id, db_user)
 
     @staticmethod
-    def edit_my_info(db: Session, token: str, updated_user: User) -> dict:
+    async def edit_my_info(db: AsyncSession, token: str, updated_user: User) -> dict:
         "Edit user's information."
         logger.info("Editing user info.")
         user_id = get_token_payload(token.credentials).get("id")
-        db_user = (db.query(User)
-                   .filter(User.id == user_id)
-                   .first())
+        db_user = await db.scalar(select(User)
+                                  .filter(User.id == user_id))
 
         if not db_user:
             logger.error(f"User with id {user_id} not found.")
@@ -49,25 +50,29 @@ class AccountService:
         for key, value in updated_user.model_dump().items():
             setattr(db_user, key, value)
 
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        db_user = await db.scalar(select(User)
+                                  .options(USER_CARTS_LOADER)
+                                  .filter(User.id == user_id)
+                                  .execution_options(populate_existing=True))
         logger.info(f"Successfully updated info for user {db_user.username} (ID: {db_user.id}).")
         return ResponseHandler.update_success(db_user.username, db_user.id, db_user)
 
     @staticmethod
-    def remove_my_account(db: Session, token: str) -> dict:
+    async def remove_my_account(db: AsyncSession, token: str) -> dict:
         "Remove user's account."
         logger.info("Removing user account.")
         user_id = get_token_payload(token.credentials).get("id")
-        db_user = (db.query(User)
-                   .filter(User.id == user_id)
-                   .first())
+        db_user = await db.scalar(select(User)
+                                  .options(USER_CARTS_LOADER)
+                                  .filter(User.id == user_id))
 
         if not db_user:
             logger.error(f"User with id {user_id} not found.")
             ResponseHandler.not_found_error("User", user_id)
 
-        db.delete(db_user)
-        db.commit()
+        await db.delete(db_user)
+        await db.commit()
+        cache_user_role(user_id, None)
         logger.info(f"User account for {db_user.username} (ID: {db_user.id}) has been removed.")
-        return ResponseHandler.delete_success(db_user.username, db_user.id, db_user)
\ No newline at end of file
+        return ResponseHandler.delete_success(db_user.username, db_user.id, db_user)
@@ -3,11 +3,13 @@ This module provides the AuthService class for handling authentication-related a
 such as user login, signup, and token refresh functionality.
 """
 
-from app.config import logger, ResponseHandler, get_password_hash, get_token_payload, get_user_token, verify_password
-from app.database import get_db, User
+from .users import USER_CARTS_LOADER
+from app.config import logger, ResponseHandler, MISSING, get_password_hash, get_token_payload, get_user_token, password_needs_rehash, revoke_token, role_cache, verify_password
+from app.database import get_session, User
 from app.schemas import TokenResponse, UserCreate, CustomOAuth2PasswordRequestForm
 from fastapi import Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 class AuthService:
     """
@@ -16,66 +18,85 @@ class AuthService:
     Methods:
         `login(user_credentials, db)`: Log in a user and return an access token.
         `signup(db, user)`: Sign up a new user and store their information in the database.
-        `get_refresh_token(token, db)`: Generate a new access token using a refresh token.
+        `get_refresh_token(token, db)`: Generate new access and refresh tokens using a refresh token, which is revoked.
+        `logout(token, db)`: Revoke a refresh token.
     """
 
     @staticmethod
-    async def login(user_credentials: CustomOAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)) -> TokenResponse:
+    async def login(user_credentials: CustomOAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_session)) -> TokenResponse:
         "Log a user in."
         logger.info(f"Attempting login for username: {user_credentials.username}")
-        user = (db.query(User)
-                .filter(User.username == user_credentials.username)
-                .first())
+        user = await db.scalar(select(User)
+                               .filter(User.username == user_credentials.username))
         if not user:
             logger.error(f"Login failed: No such username exists for {user_credentials.username}.")
             raise ResponseHandler.not_found_error(f"User with username {user_credentials.username}")
-        if not verify_password(user_credentials.password, user.password):
+        if not await verify_password(user_credentials.password, user.password):
             logger.error(f"Login failed: Incorrect password for {user_credentials.username}.")
             raise ResponseHandler.invalid_credentials("Incorrect username or password.")
+        token = await get_user_token(id=user.id, role=user.role, is_active=user.is_active)
+        if password_needs_rehash(user.password):
+            # The plain password is only known here, so outdated hashes are upgraded on login
+            logger.info(f"Rehashing outdated password hash of {user_credentials.username}.")
+            user.password = await get_password_hash(user_credentials.password)
+            await db.commit()
         logger.info(f"User {user_credentials.username} logged in successfully.")
-        return await get_user_token(id=user.id)
+        return token
 
     @staticmethod
-    async def signup(db: Session, user: UserCreate) -> dict:
+    async def signup(db: AsyncSession, user: UserCreate) -> dict:
         "Sign a new user up."
         logger.info(f"Attempting to sign up user: {user.username}")
         if not user.username or not user.password or not user.email:
             logger.error("Signup failed: Missing required fields.")
             raise ResponseHandler.malformed_request("Missing required fields: username, password, and/or email")
-        existing_user = (db.query(User)
-                         .filter(User.username == user.username)
-                         .first())
+        existing_user = await db.scalar(select(User)
+                                        .filter(User.username == user.username))
         if existing_user:
             logger.error(f"Signup failed: Username {user.username} already exists.")
             raise ResponseHandler.malformed_request("User already exists.")
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash(user.password)
         user.password = hashed_password
-        max_id = (db.query(User.id)
-                  .filter(User.id >= 500)
-                  .order_by(User.id.desc())
-                  .first())
-        new_user_id = max_id.id+1 if max_id else 500
-        db_user = User(id=new_user_id, **user.model_dump())
+        # The ID is allocated in the 500s by the users sequence
+        db_user = User(**user.model_dump())
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        db_user = await db.scalar(select(User)
+                                  .options(USER_CARTS_LOADER)
+                                  .filter(User.id == db_user.id)
+                                  .execution_options(populate_existing=True))
         logger.info(f"User {user.username} signed up successfully with ID: {db_user.id}")
         return ResponseHandler.create_success(db_user.username, db_user.id, db_user)
 
     @staticmethod
-    async def get_refresh_token(token: str, db: Session) -> TokenResponse:
-        "Get a new refresh token."
+    async def get_refresh_token(token: str, db: AsyncSession) -> TokenResponse:
+        "Rotate a refresh token: revoke it and issue new access and refresh tokens from its claims."
         logger.info("Attempting to refresh token.")
-        payload = get_token_payload(token)
+        payload = get_token_payload(token, "refresh")
         user_id = payload.get("id", None)
-        if not user_id:
-            logger.error("Refresh token is invalid: No user ID found in token.")
+        if not user_id or not payload.get("jti"):
+            logger.error("Refresh token is invalid: No user ID or token ID found in token.")
             raise ResponseHandler.invalid_credentials("Invalid refresh token")
-        user = (db.query(User)
-                .filter(User.id == user_id)
-                .first())
-        if not user:
-            logger.error(f"Refresh token is invalid: No user found with ID {user_id}.")
+        # The claims of the token stand in for the user, unless this worker saw them change
+        claims = role_cache.get(user_id)
+        if claims is None:
+            logger.error(f"Refresh token is invalid: User with ID {user_id} was deleted.")
+            raise ResponseHandler.invalid_credentials("Invalid refresh token")
+        role, is_active = (payload.get("role", "user"), payload.get("is_active", True)) if claims is MISSING else claims
+        if not await revoke_token(db, payload):
+            logger.error(f"Refresh token is invalid: Token {payload['jti']} of user ID {user_id} was already used or revoked.")
+            raise ResponseHandler.invalid_credentials("Invalid refresh token")
+        logger.info(f"Refresh token issued successfully for user ID: {user_id}.")
+        return await get_user_token(id=user_id, role=role, is_active=is_active, role_at=payload.get("role_at"))
+
+    @staticmethod
+    async def logout(token: str, db: AsyncSession) -> dict:
+        "Revoke a refresh token."
+        logger.info("Attempting to revoke refresh token.")
+        payload = get_token_payload(token, "refresh")
+        if not payload.get("jti"):
+            logger.error("Refresh token is invalid: No token ID found in token.")
             raise ResponseHandler.invalid_credentials("Invalid refresh token")
-        logger.info(f"Refresh token issued successfully for user ID: {user.id}.")
-        return await get_user_token(id=user.id, refresh_token=token)
+        await revoke_token(db, payload)
+        logger.info(f"Refresh token of user ID {payload.get('id')} revoked.")
+        return ResponseHandler.success("Logged out successfully.", None)
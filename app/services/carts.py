@@ -3,54 +3,125 @@ This module provides the CartService class for handling cart-related actions,
 such as retrieving, creating, updating, and deleting user carts and their items.
 """
 
-from app.config import logger, ResponseHandler, get_current_user
-from app.database import Cart, CartItem, Product
-from app.schemas import CartCreate, CartUpdate
-from sqlalchemy.orm import Session, joinedload
+from app.config import logger, ResponseHandler, MISSING, get_current_user, load_fields, product_cache, product_validators, paginate, next_cursor
+from app.database import Cart, CartItem, Product, primary_session
+from app.schemas import CartCreate, CartUpdate, ProductBase
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+from typing import Dict, List, Sequence
+
+# Carts are serialized with their items, and with their products when expanded, so these are loaded
+# upfront in a constant number of queries, and any other relationship raises instead of lazy loading:
+# - a page of carts fetches all of its items in one extra `IN` query, joined to their products if expanded.
+# - a single cart is fetched in one query, joined to its items and, if expanded, their products.
+# Otherwise the products are side-loaded once each, by `CartService.side_load_products`.
+CARTS_LOADER = (selectinload(Cart.cart_items).joinedload(CartItem.product), raiseload("*"))
+CART_LOADER = (joinedload(Cart.cart_items).joinedload(CartItem.product), raiseload("*"))
+CARTS_LEAN_LOADER = (selectinload(Cart.cart_items).raiseload("*"), raiseload("*"))
+CART_LEAN_LOADER = (joinedload(Cart.cart_items).raiseload("*"), raiseload("*"))
+
+
+def cart_options(loader: tuple, fields: tuple = None) -> tuple:
+    "Returns the loader options of the carts limited to `fields`, skipping their items unless they are requested."
+    if fields is not None and "cart_items" not in fields:
+        loader = (raiseload("*"),)
+    return (*loader, *load_fields(Cart, fields, Cart.id))
 
 class CartService:
     """
     Service class for cart-related actions.
 
     Methods:
-        `get_all_carts(token, db, page, limit)`: Retrieve all carts for the authenticated user.
-        `get_cart(token, db, cart_id)`: Retrieve a specific cart by its ID.
+        `price_cart_items(db, items)`: Resolve the products of the items in one query and price them.
+        `side_load_products(db, carts, fields)`: Retrieve the products of the carts' items once each, from the product cache when possible.
+        `get_all_carts(token, db, page, limit, after, fields, expand)`: Retrieve all carts for the authenticated user, optionally limited to some fields, with their products embedded or side-loaded.
+        `get_cart(token, db, cart_id, fields, expand)`: Retrieve a specific cart by its ID, optionally limited to some fields, with its products embedded or side-loaded.
         `create_cart(token, db, cart)`: Create a new cart with the provided items.
         `update_cart(token, db, cart_id, updated_cart)`: Update a specific cart and its items.
         `delete_cart(token, db, cart_id)`: Delete a specific cart and its items.
     """
 
+    @staticmethod
+    async def price_cart_items(db: AsyncSession, items: List[dict]) -> List[dict]:
+        "Resolve the products of the requested items in one query and return the priced cart item rows."
+        product_ids = {item["product_id"] for item in items}
+        products = {product.id: product
+                    for product in (await db.execute(select(Product.id, Product.price, Product.discount_percentage)
+                                                     .filter(Product.id.in_(product_ids)))).all()}
+        missing_ids = sorted(product_ids - products.keys())
+        if missing_ids:
+            logger.error(f"Products with IDs {missing_ids} not found.")
+            ResponseHandler.not_found_error(f"Products with IDs {missing_ids}")
+        cart_items = []
+        for item in items:
+            product = products[item["product_id"]]
+            subtotal = item["quantity"] * product.price * ((100 - product.discount_percentage) / 100)
+            cart_items.append({"product_id": product.id, "quantity": item["quantity"], "subtotal": subtotal})
+        return cart_items
+
+    @staticmethod
+    async def side_load_products(db: AsyncSession, carts: Sequence[Cart], fields: tuple = None) -> Dict[int, ProductBase]:
+        "Resolve the products of the items of the carts, each once, from the product cache or else in one query."
+        if fields is not None and "cart_items" not in fields:
+            return {}
+        product_ids = {item.product_id for cart in carts for item in cart.cart_items}
+        # Cached details are only reused at the current version of the products, as in the product reads
+        version, _ = await product_validators.get_version(db)
+        products = {}
+        for product_id in product_ids:
+            cached = product_cache.get(product_id)
+            if cached is not MISSING and cached[0] >= version:
+                products[product_id] = cached[1]
+        missing_ids = product_ids - products.keys()
+        if missing_ids:
+            # Filled from the primary, as in the product reads, since the details are cached
+            async with primary_session(db) as primary:
+                for product in await primary.scalars(select(Product).filter(Product.id.in_(missing_ids))):
+                    # Cache the validated details, detached from the session
+                    products[product.id] = ProductBase.model_validate(product)
+                    product_cache.set(product.id, (version, products[product.id]))
+        logger.info(f"Side-loaded {len(products)} products, {len(missing_ids)} of them from the database.")
+        return dict(sorted(products.items()))
 
     @staticmethod
-    def get_all_carts(token: str, db: Session, page: int, limit: int) -> dict:
+    async def get_all_carts(token: str, db: AsyncSession, page: int, limit: int, after: str = None,
+                            fields: tuple = None, expand: bool = False) -> dict:
         "Get all carts."
         logger.info("Retrieving all carts for the user.")
         user_id = get_current_user(token)
-        carts = (db.query(Cart)
-                 .filter(Cart.user_id == user_id)
-                 .offset((page-1) * limit)
-                 .limit(limit)
-                 .all())
+        keys = (Cart.id,)
+        carts = (await db.scalars(paginate(select(Cart)
+                                           .options(*cart_options(CARTS_LOADER if expand else CARTS_LEAN_LOADER, fields))
+                                           .filter(Cart.user_id == user_id),
+                                           "carts", keys, page, limit, after))).all()
         logger.info(f"Successfully retrieved {len(carts)} carts")
-        return ResponseHandler.get_all_success(page, limit, "carts", carts)
+        response = ResponseHandler.get_all_success(page, limit, "carts", carts,
+                                                   next_cursor("carts", keys, carts, limit))
+        if expand:
+            return response
+        return {**response, "products": await CartService.side_load_products(db, carts, fields)}
 
     @staticmethod
-    def get_cart(token: str, db: Session, cart_id: int) -> dict:
+    async def get_cart(token: str, db: AsyncSession, cart_id: int, fields: tuple = None, expand: bool = False) -> dict:
         "Get a cart by ID."
         logger.info(f"Retrieving cart with ID {cart_id}.")
         user_id = get_current_user(token)
-        cart = (db.query(Cart)
-                .filter(Cart.id == cart_id,
-                        Cart.user_id == user_id)
-                .first())
+        cart = (await db.scalars(select(Cart)
+                                 .options(*cart_options(CART_LOADER if expand else CART_LEAN_LOADER, fields))
+                                 .filter(Cart.id == cart_id,
+                                         Cart.user_id == user_id))).unique().first()
         if not cart:
             logger.error(f"Cart with ID {cart_id} not found for user {user_id}.")
             ResponseHandler.not_found_error("Cart", cart_id)
         logger.info(f"Successfully retrieved cart with ID {cart.id}.")
-        return ResponseHandler.get_single_success("cart", cart_id, cart)
+        response = ResponseHandler.get_single_success("cart", cart_id, cart)
+        if expand:
+            return response
+        return {**response, "products": await CartService.side_load_products(db, [cart], fields)}
 
     @staticmethod
-    def create_cart(token: str, db: Session, cart: CartCreate) -> dict:
+    async def create_cart(token: str, db: AsyncSession, cart: CartCreate) -> dict:
         "Create a new cart"
         logger.info("Creating a new cart.")
         if not cart.cart_items:
@@ -60,89 +131,69 @@ class CartService:
         user_id = get_current_user(token)
         cart_dict = cart.model_dump()
         cart_items_data = cart_dict.pop("cart_items", [])
-        cart_items = []
-        total_amount = 0
-        # Assign a unique cart ID in the 300s
-        max_id = (db.query(Cart.id)
-                  .filter(Cart.id >= 300)
-                  .order_by(Cart.id.desc())
-                  .first())
-        new_cart_id = max_id.id+1 if max_id else 300
-        # Add each product to the cart
-        for item_data in cart_items_data:
-            product_id = item_data["product_id"]
-            quantity = item_data["quantity"]
-            product = (db.query(Product)
-                       .filter(Product.id == product_id)
-                       .first())
-            if not product:
-                logger.error(f"Product with ID {product_id} not found.")
-                return ResponseHandler.not_found_error("Product", product_id)
-            subtotal = quantity * product.price * ((100-product.discount_percentage) / 100)
-            cart_item = CartItem(product_id=product_id, quantity=quantity, subtotal=subtotal)
-            total_amount += subtotal
-            cart_items.append(cart_item)
-        # Create a new Cart instance
-        cart_db = Cart(id=new_cart_id, cart_items=cart_items, user_id=user_id, total_amount=total_amount, **cart_dict)
+        # Price every item with a single product lookup
+        cart_items = await CartService.price_cart_items(db, cart_items_data)
+        total_amount = sum(item["subtotal"] for item in cart_items)
+        # Create a new Cart instance (its ID is allocated in the 300s by the carts sequence),
+        # then insert all of its items at once
+        cart_db = Cart(user_id=user_id, total_amount=total_amount, **cart_dict)
         db.add(cart_db)
-        db.commit()
-        db.refresh(cart_db)
+        await db.flush()
+        new_cart_id = cart_db.id
+        await db.execute(insert(CartItem), [dict(item, cart_id=new_cart_id) for item in cart_items])
+        await db.commit()
+        # Reload the cart together with its items and their products
+        cart_db = (await db.scalars(select(Cart)
+                                    .options(*CART_LOADER)
+                                    .filter(Cart.id == new_cart_id)
+                                    .execution_options(populate_existing=True))).unique().first()
         logger.info(f"Successfully created cart with ID {cart_db.id}.")
         return ResponseHandler.create_success("Cart", cart_db.id, cart_db)
 
     @staticmethod
-    def update_cart(token: str, db: Session, cart_id: int, updated_cart: CartUpdate) -> dict:
+    async def update_cart(token: str, db: AsyncSession, cart_id: int, updated_cart: CartUpdate) -> dict:
         "Update a cart and its items."
         logger.info(f"Updating cart with ID {cart_id}.")
-        # Delete old cart
         user_id = get_current_user(token)
-        cart = (db.query(Cart)
-                .filter(Cart.id == cart_id,
-                        Cart.user_id == user_id)
-                .first())
+        cart = await db.scalar(select(Cart)
+                               .options(raiseload("*"))
+                               .filter(Cart.id == cart_id,
+                                       Cart.user_id == user_id))
         if not cart:
             logger.error(f"Cart with ID {cart_id} not found for user {user_id}.")
             return ResponseHandler.not_found_error("Cart", cart_id)
-        (db.query(CartItem)
-         .filter(CartItem.cart_id == cart_id)
-         .delete())
-        # Add each product to cart
-        for item in updated_cart.cart_items:
-            product_id = item.product_id
-            quantity = item.quantity
-            product = (db.query(Product)
-                       .filter(Product.id == product_id)
-                       .first())
-            if not product:
-                logger.error(f"Product with ID {product_id} not found.")
-                return ResponseHandler.not_found_error("Product", product_id)
-            subtotal = quantity * product.price * ((100 - product.discount_percentage) / 100)
-            cart_item = CartItem(cart_id=cart_id, product_id=product_id, quantity=quantity, subtotal=subtotal)
-            db.add(cart_item)
-        # Add each cart to db
-        cart.total_amount = sum(item.subtotal for item in cart.cart_items)
-        db.commit()
-        db.refresh(cart)
+        # Price every item with a single product lookup
+        cart_items = await CartService.price_cart_items(db, updated_cart.model_dump()["cart_items"])
+        # Replace the old items with the new ones in one delete and one insert
+        await db.execute(delete(CartItem)
+                         .filter(CartItem.cart_id == cart_id))
+        if cart_items:
+            await db.execute(insert(CartItem), [dict(item, cart_id=cart_id) for item in cart_items])
+        cart.total_amount = sum(item["subtotal"] for item in cart_items)
+        await db.commit()
+        # Reload the cart together with its new items and their products
+        cart = (await db.scalars(select(Cart)
+                                 .options(*CART_LOADER)
+                                 .filter(Cart.id == cart_id)
+                                 .execution_options(populate_existing=True))).unique().first()
         logger.info(f"Successfully updated cart with ID {cart.id}.")
         return ResponseHandler.update_success("cart", cart.id, cart)
 
     @staticmethod
-    def delete_cart(token: str, db: Session, cart_id: int) -> dict:
+    async def delete_cart(token: str, db: AsyncSession, cart_id: int) -> dict:
         "Delete a cart and its items."
         logger.info(f"Deleting cart with ID {cart_id}.")
         user_id = get_current_user(token)
-        cart = (db.query(Cart)
-                .options(joinedload(Cart.cart_items)
-                        .joinedload(CartItem.product))
-                .filter(Cart.id == cart_id,
-                        Cart.user_id == user_id)
-                .first())
+        cart = (await db.scalars(select(Cart)
+                                 .options(*CART_LOADER)
+                                 .filter(Cart.id == cart_id,
+                                         Cart.user_id == user_id))).unique().first()
         if not cart:
             logger.error(f"Cart with ID {cart_id} not found for user {user_id}.")
             ResponseHandler.not_found_error("Cart", cart_id)
         for cart_item in cart.cart_items:
-            db.delete(cart_item)
-        db.delete(cart)
-        db.commit()
+            await db.delete(cart_item)
+        await db.delete(cart)
+        await db.commit()
         logger.info(f"Successfully deleted cart with ID {cart_id}.")
         return ResponseHandler.delete_success("Cart", cart_id, cart)
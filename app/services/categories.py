@@ -3,101 +3,130 @@ This module provides the CategoryService class for managing category-related act
 including retrieving, creating, updating, and deleting categories.
 """
 
-from app.config import logger, ResponseHandler
-from app.database import Category
-from app.schemas import CategoryCreate, CategoryUpdate
-from sqlalchemy.orm import Session
+from app.config import logger, ResponseHandler, MISSING, dump_json, load_fields, sparse_model, category_cache, category_pages, category_validators, product_cache, product_flights, product_pages, product_validators, paginate, next_cursor
+from app.database import Category, primary_session
+from app.schemas import CategoryBase, CategoryCreate, CategoryUpdate, CategoriesOut
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 class CategoryService:
     """
     Service class for category-related actions.
 
     Methods:
-        `get_all_categories(db, page, limit, search)`: Retrieve a paginated list of categories, optionally filtered by a search term.
-        `get_category(db, category_id)`: Retrieve a specific category by its ID.
+        `get_all_categories(db, version, page, limit, search, after, fields)`: Retrieve a paginated list of categories, optionally filtered by a search term and limited to some fields, serialized, through the page cache.
+        `get_category(db, version, category_id)`: Retrieve a specific category by its ID, served from the category cache when possible.
         `create_category(db, category)`: Create a new category with the provided details.
         `update_category(db, category_id, updated_category)`: Update a specific category's details.
         `delete_category(db, category_id)`: Delete a specific category from the database.
     """
 
     @staticmethod
-    def get_all_categories(db: Session, page: int, limit: int, search: str) -> dict:
-        "Get all categories."
+    async def get_all_categories(db: AsyncSession, version: int, page: int, limit: int, search: str, after: str = None,
+                                 fields: tuple = None) -> bytes:
+        "Get all categories, at the catalog `version` the request was validated against."
         if search == "{{searchQuery}}": search = ""
         logger.info(f"Fetching categories for page {page} with limit {limit} and search term '{search}'.")
-        categories = (db.query(Category)
-                      .order_by(Category.id.asc())
-                      .filter(Category.name.contains(search))
-                      .limit(limit)
-                      .offset((page-1) * limit)
-                      .all())
-        logger.info(f"Fetched {len(categories)} categories.")
-        return ResponseHandler.get_all_success(page, limit, "categories", categories)
+        # Pages are cached under the catalog version, so a page is never served under the ETag of a later one
+        cache_key = await category_pages.key(version=version, search=search, page=page if not after else None,
+                                             limit=limit, after=after, fields=fields)
+        cached_page = await category_pages.get(cache_key)
+        if cached_page is not None:
+            logger.info("Fetched cached categories page.")
+            return cached_page
+        # Cached pages are read from the primary, a lagging replica would pin stale rows in the cache
+        keys = (Category.id,)
+        async with primary_session(db) as primary:
+            categories = (await primary.scalars(paginate(select(Category)
+                                                         .options(*load_fields(Category, fields, *keys))
+                                                         .filter(Category.name.contains(search)),
+                                                         "categories", keys, page, limit, after))).all()
+            logger.info(f"Fetched {len(categories)} categories.")
+            response = ResponseHandler.get_all_success(page, limit, "categories", categories,
+                                                       next_cursor("categories", keys, categories, limit))
+            page_json = dump_json(sparse_model(CategoriesOut, fields), response)
+        await category_pages.set(cache_key, page_json)
+        return page_json
 
     @staticmethod
-    def get_category(db: Session, category_id: int) -> dict:
-        "Get a category by ID."
+    async def get_category(db: AsyncSession, version: int, category_id: int) -> dict:
+        "Get a category by ID, at the catalog `version` the request was validated against."
         logger.info(f"Fetching category with ID {category_id}.")
-        category = (db.query(Category)
-                    .filter(Category.id == category_id)
-                    .first())
-        if not category:
-            logger.error(f"Category with ID {category_id} not found.")
-            ResponseHandler.not_found_error("Category", category_id)
+        cached = category_cache.get(category_id)
+        # Details cached under an earlier version may predate a write, of another worker too
+        if cached is not MISSING and cached[0] >= version:
+            category = cached[1]
+            logger.info(f"Successfully retrieved cached category {category.name} (ID: {category.id}).")
+            return ResponseHandler.get_single_success(category.name, category_id, category)
+        # Read from the primary like the pages, since the details are cached too
+        async with primary_session(db) as primary:
+            category = await primary.scalar(select(Category)
+                                            .filter(Category.id == category_id))
+            if not category:
+                logger.error(f"Category with ID {category_id} not found.")
+                ResponseHandler.not_found_error("Category", category_id)
+            # Cache the validated details, detached from the session
+            category = CategoryBase.model_validate(category)
+        category_cache.set(category_id, (version, category))
         logger.info(f"Successfully retrieved category {category.name} (ID: {category.id}).")
         return ResponseHandler.get_single_success(category.name, category_id, category)
 
     @staticmethod
-    def create_category(db: Session, category: CategoryCreate) -> dict:
+    async def create_category(db: AsyncSession, category: CategoryCreate) -> dict:
         "Create a new category"
         logger.info(f"Creating new category with name {category.name}.")
         if not category or not category.name:
             logger.error("Category creation failed: Name is required.")
             raise ResponseHandler.malformed_request("Category name is required.")
-        # Find the next unique ID in the 100s
-        max_id = (db.query(Category.id)
-                  .filter(Category.id >= 100)
-                  .order_by(Category.id.desc())
-                  .first())
-        new_category_id = max_id.id+1 if max_id else 100
-        # Create a new category
-        db_category = Category(id=new_category_id, **category.model_dump())
+        # Create a new category, the ID is allocated in the 100s by the categories sequence
+        db_category = Category(**category.model_dump())
         db.add(db_category)
-        db.commit()
-        db.refresh(db_category)
+        await db.commit()
+        await db.refresh(db_category)
+        category_validators.forget()
+        await category_pages.invalidate()
         logger.info(f"Successfully created category {db_category.name} (ID: {db_category.id}).")
         return ResponseHandler.create_success(db_category.name, db_category.id, db_category)
 
     @staticmethod
-    def update_category(db: Session, category_id: int, updated_category: CategoryUpdate) -> dict:
+    async def update_category(db: AsyncSession, category_id: int, updated_category: CategoryUpdate) -> dict:
         "Update a category."
         logger.info(f"Updating category with ID {category_id}.")
-        db_category = (db.query(Category)
-                       .filter(Category.id == category_id)
-                       .first())
+        db_category = await db.scalar(select(Category)
+                                      .filter(Category.id == category_id))
         if not db_category:
             logger.error(f"Category with ID {category_id} not found.")
             ResponseHandler.not_found_error("Category", category_id)
         # Update category values
         for key, value in updated_category.model_dump().items():
             setattr(db_category, key, value)
-        db.commit()
-        db.refresh(db_category)
+        await db.commit()
+        await db.refresh(db_category)
+        category_cache.delete(category_id)
+        category_validators.forget()
+        await category_pages.invalidate()
         logger.info(f"Successfully updated category {db_category.name} (ID: {db_category.id}).")
         return ResponseHandler.update_success(db_category.name, db_category.id, db_category)
 
     @staticmethod
-    def delete_category(db: Session, category_id: int) -> dict:
+    async def delete_category(db: AsyncSession, category_id: int) -> dict:
         "Delete a category."
         logger.info(f"Deleting category with ID {category_id}.")
-        db_category = (db.query(Category)
-                       .filter(Category.id == category_id)
-                       .first())
+        db_category = await db.scalar(select(Category)
+                                      .filter(Category.id == category_id))
         if not db_category:
             logger.error(f"Category with ID {category_id} not found.")
             ResponseHandler.not_found_error("Category", category_id)
         # Delete in db
-        db.delete(db_category)
-        db.commit()
+        await db.delete(db_category)
+        await db.commit()
+        # Its products were deleted along with it by the cascade
+        category_cache.delete(category_id)
+        product_cache.clear()
+        category_validators.forget()
+        product_validators.forget()
+        await category_pages.invalidate()
+        await product_pages.invalidate()
+        product_flights.forget()
         logger.info(f"Successfully deleted category {db_category.name} (ID: {db_category.id}).")
         return ResponseHandler.delete_success(db_category.name, db_category.id, db_category)
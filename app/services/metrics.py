@@ -0,0 +1,44 @@
+"""
+This module provides the MetricsService class for reporting runtime metrics of the current worker.
+"""
+
+from app.config import logger, ResponseHandler, get_caches, password_hash_pool, product_flights, role_cache, token_cache
+from app.database import get_engine_pools, get_pool_stats
+
+class MetricsService:
+    """
+    Service class for runtime metrics.
+
+    Methods:
+        `get_pool_stats()`: Retrieve occupancy and checkout wait times of every database connection pool.
+        `get_cache_stats()`: Retrieve size and hit/miss/eviction counters of every in-process cache.
+        `get_coalescing_stats()`: Retrieve reads in flight and requests collapsed per key of every coalescing layer.
+        `get_password_hash_stats()`: Retrieve queue depth and queue wait times of the password hashing pool.
+    """
+
+    @staticmethod
+    async def get_pool_stats() -> dict:
+        "Get database connection pool statistics."
+        logger.info("Collecting database pool statistics.")
+        stats = [get_pool_stats(name, pool) for name, pool in get_engine_pools().items()]
+        return ResponseHandler.success("Database pool statistics", stats)
+
+    @staticmethod
+    async def get_cache_stats() -> dict:
+        "Get in-process cache statistics."
+        logger.info("Collecting cache statistics.")
+        stats = [cache.stats() for cache in [*get_caches(), token_cache, role_cache]]
+        return ResponseHandler.success("Cache statistics", stats)
+
+    @staticmethod
+    async def get_coalescing_stats() -> dict:
+        "Get request coalescing statistics."
+        logger.info("Collecting request coalescing statistics.")
+        stats = [flights.stats() for flights in [product_flights]]
+        return ResponseHandler.success("Request coalescing statistics", stats)
+
+    @staticmethod
+    async def get_password_hash_stats() -> dict:
+        "Get password hashing pool statistics."
+        logger.info("Collecting password hashing statistics.")
+        return ResponseHandler.success("Password hashing statistics", password_hash_pool.stats())
@@ -3,51 +3,153 @@ This module provides the ProductService class for handling product-related actio
 including retrieving, creating, updating, and deleting products in the database.
 """
 
-from app.config import logger, ResponseHandler
-from app.database import Category, Product
-from app.schemas import ProductCreate, ProductUpdate
-from sqlalchemy.orm import Session
+from app.config import logger, ResponseHandler, MISSING, dump_json, load_fields, sparse_model, product_cache, product_flights, product_pages, product_validators, paginate, next_cursor
+from app.database import Category, Product, primary_session
+from app.schemas import ProductBase, ProductCreate, ProductFilters, ProductsOut, ProductUpdate
+from sqlalchemy import cast, func, select
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import with_expression
+import json
+import re
+
+# Sort orders of the product listings, as the sort key columns (unique ID last) and their direction,
+# each one is served by a composite index on the same columns, with or without the category first
+PRODUCT_SORTS = {
+    None: ((Product.id,), False),
+    "price": ((Product.price, Product.id), False),
+    "-price": ((Product.price, Product.id), True),
+    "rating": ((Product.rating, Product.id), True),
+    "newest": ((Product.created_at, Product.id), True),
+    "discount": ((Product.discount_percentage, Product.id), True),
+}
+
+
+def filter_products(query, filters: ProductFilters):
+    "Applies the filters that are set in `filters` to a products query."
+    if filters.category_id is not None:
+        query = query.filter(Product.category_id == filters.category_id)
+    if filters.brand is not None:
+        query = query.filter(Product.brand == filters.brand)
+    if filters.min_price is not None:
+        query = query.filter(Product.price >= filters.min_price)
+    if filters.max_price is not None:
+        query = query.filter(Product.price <= filters.max_price)
+    if filters.min_rating is not None:
+        query = query.filter(Product.rating >= filters.min_rating)
+    if filters.is_published is not None:
+        query = query.filter(Product.is_published == filters.is_published)
+    if filters.in_stock is not None:
+        query = query.filter(Product.stock > 0 if filters.in_stock else Product.stock == 0)
+    return query
+
+
+def search_query(search: str):
+    """
+    Builds the text search query of a search box input, with the web search syntax of Postgres
+    (quoted phrases, `or`, `-word`). The last word is also matched as a prefix while it is being typed.
+    """
+    query = func.websearch_to_tsquery("english", search)
+    last_word = re.search(r"(?<!-)\b\w+$", search)
+    if last_word:
+        prefix = func.to_tsquery("simple", f"{last_word.group()}:*")
+        query = query.op("||")(func.websearch_to_tsquery("english", search[:last_word.start()]).op("&&")(prefix))
+    return query
+
 
 class ProductService:
     """
     Service class for product-related actions.
 
     Methods:
-        `get_all_products(db, page, limit, search)`: Retrieve a paginated list of products, optionally filtered by a search term.
-        `get_product(db, product_id)`: Retrieve a specific product by its ID.
+        `get_all_products(db, version, page, limit, search, after, filters, fields)`: Retrieve a paginated list of products, optionally searched, filtered, sorted and limited to some fields, serialized, through the page cache.
+        `read_products_page(db, cache_key, search, page, limit, after, filters, fields)`: Read one serialized page of products from the database into the page cache, shared by identical concurrent requests.
+        `query_products_page(db, search, page, limit, after, filters, fields)`: Query one page of products from the database, bypassing the page cache.
+        `get_product(db, version, product_id)`: Retrieve a specific product by its ID, served from the product cache when possible.
         `create_product(db, product)`: Create a new product with the provided details.
         `update_product(db, product_id, updated_product)`: Update a specific product's details.
         `delete_product(db, product_id)`: Delete a specific product from the database.
     """
 
     @staticmethod
-    def get_all_products(db: Session, page: int, limit: int, search: str) -> dict:
-        "Get all products."
+    async def get_all_products(db: AsyncSession, version: int, page: int, limit: int, search: str, after: str = None,
+                               filters: ProductFilters = ProductFilters(), fields: tuple = None) -> bytes:
+        "Get all products, at the catalog `version` the request was validated against."
         if search == "{{searchQuery}}": search = ""
-        logger.info(f"Fetching all products with search term '{search}', page {page}, and limit {limit}.")
-        products = (db.query(Product)
-                    .order_by(Product.id.asc())
-                    .filter(Product.title.contains(search))
-                    .limit(limit)
-                    .offset((page-1) * limit)
-                    .all())
+        logger.info(f"Fetching all products with search term '{search}', filters {filters.model_dump(exclude_none=True)}, page {page}, and limit {limit}.")
+        # Text search ignores case and spacing, so such variants of a search share their cached pages
+        search = " ".join(search.lower().split())
+        # Pages are cached and shared under the catalog version, so a page is never served under the ETag of a later one
+        params = dict(version=version, search=search, page=page if not after else None, limit=limit,
+                      after=after, filters=filters.model_dump(exclude_none=True), fields=fields)
+        cache_key = await product_pages.key(**params)
+        cached_page = await product_pages.get(cache_key)
+        if cached_page is not None:
+            logger.info("Successfully retrieved cached products page.")
+            return cached_page
+        # Identical concurrent requests missing the cache share one query of the page
+        return await product_flights.do(
+            json.dumps(params, sort_keys=True),
+            lambda: ProductService.read_products_page(db, cache_key, search, page, limit, after, filters, fields))
+
+    @staticmethod
+    async def read_products_page(db: AsyncSession, cache_key: str, search: str, page: int, limit: int, after: str,
+                                 filters: ProductFilters, fields: tuple = None) -> bytes:
+        "Read a page of products, serialized, from the database into the page cache."
+        # Cached pages are read from the primary, a lagging replica would pin stale rows in the cache
+        async with primary_session(db) as primary:
+            response = await ProductService.query_products_page(primary, search, page, limit, after, filters, fields)
+            page_json = dump_json(sparse_model(ProductsOut, fields), response)
+        await product_pages.set(cache_key, page_json)
+        return page_json
+
+    @staticmethod
+    async def query_products_page(db: AsyncSession, search: str, page: int, limit: int, after: str,
+                                  filters: ProductFilters, fields: tuple = None) -> dict:
+        "Query a page of products from the database, bypassing the page cache."
+        query = filter_products(select(Product), filters)
+        (keys, descending), scope = PRODUCT_SORTS[filters.sort], f"products:{filters.sort or 'id'}"
+        if search:
+            # Served by the GIN index on the search vector, most relevant first. The rank is widened
+            # to double precision so that it round trips exactly through the page cursor.
+            tsquery = search_query(search)
+            rank = cast(func.ts_rank(Product.search_vector, tsquery), DOUBLE_PRECISION).label("search_rank")
+            query = (query.options(with_expression(Product.search_rank, rank))
+                     .filter(Product.search_vector.op("@@")(tsquery)))
+            if not filters.sort:
+                (keys, descending), scope = ((rank, Product.id), True), "products:relevance"
+        # Only the requested columns are loaded, and the sort keys that the next cursor is made of
+        query = query.options(*load_fields(Product, fields, *keys))
+        products = (await db.scalars(paginate(query, scope, keys, page, limit, after, descending))).all()
         logger.info(f"Successfully retrieved {len(products)} products.")
-        return ResponseHandler.get_all_success(page, limit, "products", products)
+        return ResponseHandler.get_all_success(page, limit, "products", products,
+                                               next_cursor(scope, keys, products, limit))
 
     @staticmethod
-    def get_product(db: Session, product_id: int) -> dict:
-        "Get a product by ID."
+    async def get_product(db: AsyncSession, version: int, product_id: int) -> dict:
+        "Get a product by ID, at the catalog `version` the request was validated against."
         logger.info(f"Fetching product with ID {product_id}.")
-        product = (db.query(Product)
-                   .filter(Product.id == product_id)
-                   .first())
-        if not product:
-            logger.error(f"Product with ID {product_id} not found.")
-            ResponseHandler.not_found_error("Product", product_id)
+        cached = product_cache.get(product_id)
+        # Details cached under an earlier version may predate a write, of another worker too
+        if cached is not MISSING and cached[0] >= version:
+            product = cached[1]
+            logger.info(f"Successfully retrieved cached product: {product.title} (ID: {product.id}).")
+            return ResponseHandler.get_single_success(product.title, product_id, product)
+        # Read from the primary like the pages, since the details are cached too
+        async with primary_session(db) as primary:
+            product = await primary.scalar(select(Product)
+                                           .filter(Product.id == product_id))
+            if not product:
+                logger.error(f"Product with ID {product_id} not found.")
+                ResponseHandler.not_found_error("Product", product_id)
+            # Cache the validated details, detached from the session
+            product = ProductBase.model_validate(product)
+        product_cache.set(product_id, (version, product))
         logger.info(f"Successfully retrieved product: {product.title} (ID: {product.id}).")
         return ResponseHandler.get_single_success(product.title, product_id, product)
 
-    def create_product(db: Session, product: ProductCreate) -> dict:
+    @staticmethod
+    async def create_product(db: AsyncSession, product: ProductCreate) -> dict:
         "Create a new product"
         logger.info(f"Creating product with title '{product.title}' and category ID {product.category_id}.")
         # Check for empty values
@@ -56,33 +158,28 @@ class ProductService:
                 logger.error(f"Field '{field}' cannot be empty.")
                 raise ResponseHandler.malformed_request(f"Field '{field}' cannot be empty.")
         # Check if category exists
-        category_exists = (db.query(Category)
-                           .filter(Category.id == product.category_id)
-                           .first())
+        category_exists = await db.scalar(select(Category)
+                                          .filter(Category.id == product.category_id))
         if not category_exists:
             logger.error(f"Category with ID {product.category_id} not found.")
             ResponseHandler.not_found_error("Category", product.category_id)
-        # Find the next unique ID in the 200s
-        max_id = (db.query(Product.id)
-                  .filter(Product.id >= 200)
-                  .order_by(Product.id.desc())
-                  .first())
-        new_product_id = max_id.id+1 if max_id else 200
-        # Insert into db
-        db_product = Product(id=new_product_id, **product.model_dump())
+        # Insert into db, the ID is allocated in the 200s by the products sequence
+        db_product = Product(**product.model_dump(exclude={"id"}))
         db.add(db_product)
-        db.commit()
-        db.refresh(db_product)
+        await db.commit()
+        await db.refresh(db_product)
+        product_validators.forget()
+        await product_pages.invalidate()
+        product_flights.forget()
         logger.info(f"Successfully created product: {db_product.title} (ID: {db_product.id}).")
         return ResponseHandler.create_success(db_product.title, db_product.id, db_product)
 
     @staticmethod
-    def update_product(db: Session, product_id: int, updated_product: ProductUpdate) -> dict:
+    async def update_product(db: AsyncSession, product_id: int, updated_product: ProductUpdate) -> dict:
         "Update a product."
         logger.info(f"Updating product with ID {product_id}.")
-        db_product = (db.query(Product)
-                      .filter(Product.id == product_id)
-                      .first())
+        db_product = await db.scalar(select(Product)
+                                     .filter(Product.id == product_id))
         if not db_product:
             logger.error(f"Product with ID {product_id} not found.")
             ResponseHandler.not_found_error("Product", product_id)
@@ -90,23 +187,31 @@ class ProductService:
         for key, value in updated_product.model_dump().items():
             setattr(db_product, key, value)
         
-        db.commit()
-        db.refresh(db_product)
+        await db.commit()
+        await db.refresh(db_product)
+        product_cache.delete(product_id)
+        product_cache.delete(db_product.id)
+        product_validators.forget()
+        await product_pages.invalidate()
+        product_flights.forget()
         logger.info(f"Successfully updated product: {db_product.title} (ID: {db_product.id}).")
         return ResponseHandler.update_success(db_product.title, db_product.id, db_product)
 
     @staticmethod
-    def delete_product(db: Session, product_id: int) -> dict:
+    async def delete_product(db: AsyncSession, product_id: int) -> dict:
         "Delete a product."
         logger.info(f"Deleting product with ID {product_id}.")
-        db_product = (db.query(Product)
-                      .filter(Product.id == product_id)
-                      .first())
+        db_product = await db.scalar(select(Product)
+                                     .filter(Product.id == product_id))
         if not db_product:
             logger.error(f"Product with ID {product_id} not found.")
             ResponseHandler.not_found_error("Product", product_id)
         
-        db.delete(db_product)
-        db.commit()
+        await db.delete(db_product)
+        await db.commit()
+        product_cache.delete(product_id)
+        product_validators.forget()
+        await product_pages.invalidate()
+        product_flights.forget()
         logger.info(f"Successfully deleted product: {db_product.title} (ID: {db_product.id}).")
         return ResponseHandler.delete_success(db_product.title, db_product.id, db_product)
@@ -1,14 +1,22 @@
-from app.config import logger, ResponseHandler, get_password_hash
-from app.database import User
+from app.config import logger, ResponseHandler, cache_user_role, get_password_hash, paginate, next_cursor
+from app.database import Cart, CartItem, User
 from app.schemas import UserCreate, UserUpdate
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+# Users are serialized with their carts, items and products, so these are loaded upfront
+# with one `IN` query for the carts and one for their items, joined to their products
+USER_CARTS_LOADER = (selectinload(User.carts)
+                     .selectinload(Cart.cart_items)
+                     .joinedload(CartItem.product))
 
 class UserService:
     """
     Service class for user-related actions.
 
     Methods:
-        `get_all_users(db, page, limit, search, role)`: Retrieve a paginated list of users, optionally filtered by a search term and role.
+        `get_all_users(db, page, limit, search, role, after)`: Retrieve a paginated list of users, optionally filtered by a search term and role.
         `get_user(db, user_id)`: Retrieve a specific user by their ID.
         `create_user(db, user)`: Create a new user with the provided details.
         `update_user(db, user_id, updated_user)`: Update a specific user's details.
@@ -17,27 +25,27 @@ class UserService:
 
 
     @staticmethod
-    def get_all_users(db: Session, page: int, limit: int, search: str = "", role: str = "") -> dict:
+    async def get_all_users(db: AsyncSession, page: int, limit: int, search: str = "", role: str = "", after: str = None) -> dict:
         "Get all users."
         if search == "{{searchQuery}}": search = ""
         logger.info(f"Fetching all users with search term '{search}', role '{role}', page {page}, and limit {limit}.")
-        users = (db.query(User)
-                 .order_by(User.id.asc())
-                 .filter(User.username.contains(search),
-                         User.role.contains(role))
-                 .limit(limit)
-                 .offset((page-1) * limit)
-                 .all())
+        keys = (User.id,)
+        users = (await db.scalars(paginate(select(User)
+                                           .options(USER_CARTS_LOADER)
+                                           .filter(User.username.contains(search),
+                                                   User.role.contains(role)),
+                                           "users", keys, page, limit, after))).all()
         logger.info(f"Successfully retrieved {len(users)} users.")
-        return ResponseHandler.get_all_success(page, limit, "users", users)
+        return ResponseHandler.get_all_success(page, limit, "users", users,
+                                               next_cursor("users", keys, users, limit))
 
     @staticmethod
-    def get_user(db: Session, user_id: int) -> dict:
+    async def get_user(db: AsyncSession, user_id: int) -> dict:
         "Get a user by ID."
         logger.info(f"Fetching user with ID {user_id}.")
-        user = (db.query(User)
-                .filter(User.id == user_id)
-                .first())
+        user = await db.scalar(select(User)
+                               .options(USER_CARTS_LOADER)
+                               .filter(User.id == user_id))
         if not user:
             logger.error(f"User with ID {user_id} not found.")
             ResponseHandler.not_found_error("User", user_id)
@@ -45,61 +53,62 @@ class UserService:
         return ResponseHandler.get_single_success(user.username, user_id, user)
 
     @staticmethod
-    def create_user(db: Session, user: UserCreate) -> dict:
+    async def create_user(db: AsyncSession, user: UserCreate) -> dict:
         "Create a new user."
         logger.info(f"Creating new user with username '{user.username}'.")
         if not user.username or not user.password or not user.email:
             logger.error("User creation failed: Missing required fields.")
             raise ResponseHandler.malformed_request("Missing required fields: username, password, and/or email")
-        existing_user = (db.query(User)
-                         .filter(User.username == user.username)
-                         .first())
+        existing_user = await db.scalar(select(User)
+                                        .filter(User.username == user.username))
         if existing_user:
             logger.error(f"User creation failed: Username {user.username} already exists.")
             raise ResponseHandler.malformed_request("User already exists.")
-        hashed_password = get_password_hash(user.password)
+        hashed_password = await get_password_hash(user.password)
         user.password = hashed_password
-        # Find the next unique ID in the 500s
-        max_id = (db.query(User.id)
-                  .filter(User.id >= 500)
-                  .order_by(User.id.desc())
-                  .first())
-        new_user_id = max_id.id+1 if max_id else 500
-        db_user = User(id=new_user_id, **user.model_dump())
+        # The ID is allocated in the 500s by the users sequence
+        db_user = User(**user.model_dump())
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        db_user = await db.scalar(select(User)
+                                  .options(USER_CARTS_LOADER)
+                                  .filter(User.id == db_user.id)
+                                  .execution_options(populate_existing=True))
         logger.info(f"Successfully created user: {db_user.username} (ID: {db_user.id}).")
         return ResponseHandler.create_success(db_user.username, db_user.id, db_user)
 
     @staticmethod
-    def update_user(db: Session, user_id: int, updated_user: UserUpdate) -> dict:
+    async def update_user(db: AsyncSession, user_id: int, updated_user: UserUpdate) -> dict:
         "Update a user."
         logger.info(f"Updating user with ID {user_id}.")
-        db_user = (db.query(User)
-                   .filter(User.id == user_id)
-                   .first())
+        db_user = await db.scalar(select(User)
+                                  .filter(User.id == user_id))
         if not db_user:
             logger.error(f"User with ID {user_id} not found.")
             ResponseHandler.not_found_error("User", user_id)
         for key, value in updated_user.model_dump().items():
             setattr(db_user, key, value)
-        db.commit()
-        db.refresh(db_user)
+        await db.commit()
+        db_user = await db.scalar(select(User)
+                                  .options(USER_CARTS_LOADER)
+                                  .filter(User.id == user_id)
+                                  .execution_options(populate_existing=True))
+        cache_user_role(db_user.id, db_user)
         logger.info(f"Successfully updated user: {db_user.username} (ID: {db_user.id}).")
         return ResponseHandler.update_success(db_user.username, db_user.id, db_user)
 
     @staticmethod
-    def delete_user(db: Session, user_id: int) -> dict:
+    async def delete_user(db: AsyncSession, user_id: int) -> dict:
         "Delete a user."
         logger.info(f"Deleting user with ID {user_id}.")
-        db_user = (db.query(User)
-                   .filter(User.id == user_id)
-                   .first())
+        db_user = await db.scalar(select(User)
+                                  .options(USER_CARTS_LOADER)
+                                  .filter(User.id == user_id))
         if not db_user:
             logger.error(f"User with ID {user_id} not found.")
             ResponseHandler.not_found_error("User", user_id)
-        db.delete(db_user)
-        db.commit()
+        await db.delete(db_user)
+        await db.commit()
+        cache_user_role(user_id, None)
         logger.info(f"Successfully deleted user: {db_user.username} (ID: {db_user.id}).")
         return ResponseHandler.delete_success(db_user.username, db_user.id, db_user)
@@ -0,0 +1,41 @@
+"""
+Benchmarks the CPU cost of a login at each bcrypt cost factor, to pick `BCRYPT_ROUNDS` for the hardware.
+
+A login verifies one password, so the logins per second of a core are the password verifications a single
+thread completes per second. A worker handles up to `PASSWORD_HASH_WORKERS` times as many, bounded by its
+cores. No database is needed. Run it from the project root:
+
+    python -m scripts.benchmark_bcrypt --min-rounds 10 --max-rounds 14
+"""
+
+import argparse
+import time
+from passlib.context import CryptContext
+
+PASSWORD = "correct horse battery staple"
+
+
+def measure(rounds: int, seconds: float) -> tuple:
+    "Verifies a password hashed at `rounds` for about `seconds`, returns the verifications and time taken."
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=rounds)
+    hashed = context.hash(PASSWORD)
+    verifications, start = 0, time.perf_counter()
+    while verifications == 0 or time.perf_counter() - start < seconds:
+        context.verify(PASSWORD, hashed)
+        verifications += 1
+    return verifications, time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-rounds", type=int, default=10, help="Lowest cost factor measured.")
+    parser.add_argument("--max-rounds", type=int, default=14, help="Highest cost factor measured.")
+    parser.add_argument("--seconds", type=float, default=2.0, help="Time spent measuring each cost factor.")
+    args = parser.parse_args()
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        verifications, elapsed = measure(rounds, args.seconds)
+        print(f"rounds {rounds:2}  {elapsed / verifications * 1000:9.1f} ms/login  {verifications / elapsed:8.1f} logins/s per core")
+
+
+if __name__ == "__main__":
+    main()
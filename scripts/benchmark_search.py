@@ -0,0 +1,99 @@
+"""
+Benchmarks product search on a large catalog: the former `LIKE '%term%'` title filter against the
+full-text search of `ProductService.query_products_page`, backed by the GIN index on `search_vector`.
+Both run on the database every time: the page cache and the shared reads of `get_all_products` are
+bypassed, since their keys ignore the scratch schema and would mostly time cache hits.
+
+The products are generated in a scratch `search_benchmark` schema of the `DB_URL` database, which is
+dropped afterwards, so the application tables are left untouched. Run it from the project root:
+
+    python -m scripts.benchmark_search --products 1000000
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from app.services import ProductService  # Loads the config before the database, circular dependency
+from app.database import Product
+from app.database.database import ThreadedSession, engine
+from app.schemas import ProductFilters
+from sqlalchemy import select, text
+from sqlalchemy.orm import sessionmaker
+
+SCHEMA = "search_benchmark"
+SYLLABLES = ["ba", "ko", "mi", "ru", "se", "ta", "vo", "zi", "la", "ne", "po", "gu", "fa", "di", "cho", "wen", "tri", "sol", "mar", "qui"]
+# Common words first, then synthetic ones, picked with a skewed distribution like real catalog vocabularies
+WORDS = ["red", "blue", "black", "wireless", "leather", "smart", "organic", "portable", "vintage", "pro",
+         "phone", "case", "charger", "laptop", "stand", "shoes", "jacket", "watch", "lamp", "speaker",
+         "headphones", "backpack", "bottle", "camera", "keyboard", "mouse", "sofa", "table", "perfume", "tea",
+         *("".join(word) for word in itertools.product(SYLLABLES, repeat=3))]
+SEARCHES = ["phone", "wireless charger", "red leather jacket", "head", "vintage -camera", "xylophone"]
+
+
+def seed(products: int) -> None:
+    "Creates the scratch products table, with the same columns and indexes, and fills it with random products."
+    words = "ARRAY[" + ", ".join(f"'{word}'" for word in WORDS) + "]"
+    pick = f"({words})[1 + floor(power(random(), 3) * {len(WORDS)})::int]"
+    with engine.begin() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"CREATE TABLE {SCHEMA}.products (LIKE public.products INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING INDEXES)"))
+        connection.execute(text(f"""
+            INSERT INTO {SCHEMA}.products (id, title, description, price, discount_percentage, rating, stock,
+                                           brand, thumbnail, images, is_published, category_id)
+            SELECT i, {pick} || ' ' || {pick} || ' ' || {pick},
+                   'A ' || {pick} || ' ' || {pick} || ' for every ' || {pick} || ' and ' || {pick},
+                   (random() * 1000)::int, 0, 4.5, 10, 'brand', 'thumbnail', ARRAY['image'], true, 100
+            FROM generate_series(1, {products}) AS i"""))
+        connection.execute(text(f"ANALYZE {SCHEMA}.products"))
+
+
+def percentiles(timings: list) -> str:
+    "Formats the median and 95th percentile of `timings`, in milliseconds."
+    timings = sorted(timings)
+    return f"p50 {statistics.median(timings) * 1000:8.2f} ms  p95 {timings[int(len(timings) * 0.95)] * 1000:8.2f} ms"
+
+
+async def measure(runs: int, limit: int) -> None:
+    "Times both searches on every search term, through sessions bound to the scratch schema."
+    bench_engine = engine.execution_options(schema_translate_map={None: SCHEMA})
+    db = ThreadedSession(sessionmaker(bind=bench_engine)())
+    try:
+        for search in SEARCHES:
+            like, full_text = [], []
+            for _ in range(runs):
+                start = time.perf_counter()
+                (await db.scalars(select(Product)
+                                  .filter(Product.title.contains(search))
+                                  .order_by(Product.id.asc())
+                                  .limit(limit))).all()
+                like.append(time.perf_counter() - start)
+                start = time.perf_counter()
+                await ProductService.query_products_page(db, search, 1, limit, None, ProductFilters())
+                full_text.append(time.perf_counter() - start)
+                db.sync_session.expunge_all()
+            print(f"{search!r:24} LIKE      {percentiles(like)}")
+            print(f"{'':24} full-text {percentiles(full_text)}")
+    finally:
+        await db.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=1_000_000, help="Number of products to generate.")
+    parser.add_argument("--runs", type=int, default=20, help="Timed runs per search term.")
+    parser.add_argument("--limit", type=int, default=20, help="Page size of each search.")
+    args = parser.parse_args()
+    print(f"Generating {args.products} products...")
+    seed(args.products)
+    try:
+        asyncio.run(measure(args.runs, args.limit))
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
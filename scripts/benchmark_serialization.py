@@ -0,0 +1,99 @@
+"""
+Benchmarks the serialization of the `GET /products?limit=100` and `GET /carts` responses: FastAPI's path
+for a returned dict (validation against the `response_model`, conversion to JSON-compatible objects and
+encoding with the `json` module) against the single pass of `dump_json`, and against serving the
+products page already serialized by the page cache.
+
+The responses are built from ORM objects created in memory, so no database is needed and only the
+serialization is measured. Run it from the project root:
+
+    python -m scripts.benchmark_serialization --runs 200
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from app.config import ResponseHandler, dump_json, json_response  # Loads the config before the database, circular dependency
+from app.database import Cart, CartItem, Product
+from app.schemas import CartsOut, ProductsOut
+from datetime import datetime, timezone
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+
+def make_product(id: int) -> Product:
+    "Creates a product in memory, with realistic field sizes."
+    return Product(id=200 + id % 100, title=f"Wireless phone charger {id}", description="A fast charger for every phone " * 4,
+                   price=100 + id, discount_percentage=12.5, rating=4.5, stock=25, brand="Acme",
+                   thumbnail="https://cdn.example.com/products/thumbnail.jpg",
+                   images=[f"https://cdn.example.com/products/{id}/{i}.jpg" for i in range(4)], is_published=True,
+                   created_at=datetime(2024, 1, 1, tzinfo=timezone.utc), category_id=100)
+
+
+def make_responses(products: int, carts: int, items: int) -> dict:
+    "Builds the response dicts of a products page and of a carts page, as the services return them."
+    page = [make_product(i) for i in range(products)]
+    cart_list = [Cart(id=300 + c, user_id=500, created_at=datetime(2024, 1, 1, tzinfo=timezone.utc), total_amount=1000.0,
+                      cart_items=[CartItem(id=c * items + i, product_id=page[i].id, quantity=2, subtotal=200.0, product=page[i])
+                                  for i in range(items)])
+                 for c in range(carts)]
+    return {
+        ProductsOut: ResponseHandler.get_all_success(1, products, "products", page, "cursor"),
+        CartsOut: ResponseHandler.get_all_success(1, carts, "carts", cart_list, "cursor"),
+    }
+
+
+async def fastapi_path(schema: type, response: dict, response_class: type = JSONResponse) -> bytes:
+    "Serializes a returned dict the way FastAPI does for a route with `response_model=schema`."
+    field = create_response_field(name="response", type_=schema)
+    content = await serialize_response(field=field, response_content=response, is_coroutine=True)
+    return response_class(content).body
+
+
+async def cached_page_path(schema: type, page: bytes, response_class: type = JSONResponse) -> bytes:
+    "Serves a page from the page cache, decoded and then serialized again by FastAPI."
+    return await fastapi_path(schema, json.loads(page), response_class)
+
+
+async def timed(runs: int, function, *args) -> str:
+    "Formats the median and 95th percentile of `runs` calls to `function`, in milliseconds."
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function(*args)
+        if asyncio.iscoroutine(result):
+            await result
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    return f"p50 {statistics.median(timings) * 1000:8.3f} ms  p95 {timings[int(len(timings) * 0.95)] * 1000:8.3f} ms"
+
+
+async def measure(runs: int, products: int, carts: int, items: int) -> None:
+    "Times every serialization path of both responses."
+    responses = make_responses(products, carts, items)
+    for schema, response in responses.items():
+        print(f"{schema.__name__}:")
+        print(f"  response_model, json      {await timed(runs, fastapi_path, schema, response)}")
+        print(f"  response_model, orjson    {await timed(runs, fastapi_path, schema, response, ORJSONResponse)}")
+        print(f"  dump_json single pass     {await timed(runs, lambda: json_response(dump_json(schema, response)))}")
+    page = dump_json(ProductsOut, responses[ProductsOut])
+    print("ProductsOut from the page cache:")
+    print(f"  decoded, response_model   {await timed(runs, cached_page_path, ProductsOut, page)}")
+    print(f"  served as is              {await timed(runs, json_response, page)}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=200, help="Timed runs per serialization path.")
+    parser.add_argument("--products", type=int, default=100, help="Products per page.")
+    parser.add_argument("--carts", type=int, default=20, help="Carts per page.")
+    parser.add_argument("--items", type=int, default=5, help="Items per cart.")
+    args = parser.parse_args()
+    asyncio.run(measure(args.runs, args.products, args.carts, args.items))
+
+
+if __name__ == "__main__":
+    main()
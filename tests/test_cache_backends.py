@@ -0,0 +1,134 @@
+"""
+Tests of the listing page caches and their backends. The Redis backend talks to a stand-in server on a local
+port, speaking enough of the Redis protocol for it, so these tests need neither Redis nor the test database.
+"""
+
+import asyncio
+import pytest
+import socket
+import time
+
+redis = pytest.importorskip("redis")
+
+
+class StandInRedis:
+    """
+    A stand-in for a Redis server, handling the `GET`, `SET` with `PX` and `INCRBY` commands of `RedisBackend`,
+    in the RESP2 protocol or in RESP3 for the clients switching to it with `HELLO 3`.
+    """
+
+    def __init__(self) -> None:
+        self.values = {}
+
+    def get(self, key: bytes):
+        value, expires_at = self.values.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.values[key]
+            return None
+        return value
+
+    def execute(self, args: list, resp3: bool) -> bytes:
+        command = args[0].upper()
+        if command == b"HELLO":
+            return b"%%1\r\n+proto\r\n:%s\r\n" % args[1]
+        if command == b"GET":
+            value = self.get(args[1])
+            if value is None:
+                return b"_\r\n" if resp3 else b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if command == b"SET":
+            px = len(args) > 4 and args[3].upper() == b"PX"
+            self.values[args[1]] = (args[2], time.monotonic() + int(args[4]) / 1000 if px else None)
+            return b"+OK\r\n"
+        if command in (b"INCR", b"INCRBY"):
+            value = int(self.get(args[1]) or 0) + (int(args[2]) if len(args) > 2 else 1)
+            self.values[args[1]] = (str(value).encode(), None)
+            return b":%d\r\n" % value
+        # Connection setup, such as `CLIENT SETINFO`
+        return b"+OK\r\n"
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        resp3 = False
+        try:
+            while line := await reader.readline():
+                args = []
+                for _ in range(int(line[1:])):
+                    size = int((await reader.readline())[1:])
+                    args.append((await reader.readexactly(size + 2))[:-2])
+                resp3 = resp3 or args[:2] == [b"HELLO", b"3"]
+                writer.write(self.execute(args, resp3))
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+def with_backend(kind: str):
+    "Runs the decorated coroutine with a fresh backend of `kind`, `memory` or `redis` on a stand-in server."
+    def decorator(test):
+        def run(*args, **kwargs):
+            async def main():
+                from app.config.cache import MemoryBackend, RedisBackend
+                if kind == "memory":
+                    return await test(MemoryBackend(16), *args, **kwargs)
+                server = await asyncio.start_server(StandInRedis().handle, "127.0.0.1", 0)
+                backend = RedisBackend(f"redis://127.0.0.1:{server.sockets[0].getsockname()[1]}/0")
+                try:
+                    return await test(backend, *args, **kwargs)
+                finally:
+                    await backend.client.aclose()
+                    server.close()
+            return asyncio.run(main())
+        return run
+    return decorator
+
+
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+def test_get_set_with_ttl_and_incr(kind):
+    @with_backend(kind)
+    async def test(backend):
+        assert await backend.get("page") is None
+        await backend.set("page", b"body", 0.2)
+        assert await backend.get("page") == b"body"
+        await asyncio.sleep(0.3)
+        assert await backend.get("page") is None
+        assert [await backend.incr("version"), await backend.incr("version")] == [1, 2]
+        assert await backend.get("version") == b"2"
+    test()
+
+
+@pytest.mark.parametrize("kind", ["memory", "redis"])
+def test_version_bump_hides_old_pages(kind):
+    @with_backend(kind)
+    async def test(backend):
+        from app.config.cache import PageCache
+        pages = PageCache(backend, "products", 60)
+        key = await pages.key(version=1, page=1, limit=10)
+        await pages.set(key, b"old page")
+        assert await pages.key(version=1, page=1, limit=10) == key
+        assert await pages.get(key) == b"old page"
+        # Either version hides the pages cached under the previous one: the catalog's, and the namespace's
+        assert await pages.get(await pages.key(version=2, page=1, limit=10)) is None
+        await pages.invalidate()
+        new_key = await pages.key(version=1, page=1, limit=10)
+        assert new_key != key and await pages.get(new_key) is None
+    test()
+
+
+def test_backend_errors_are_misses():
+    from app.config.cache import PageCache, RedisBackend
+    # A port nothing listens on, every command of the backend then fails to connect
+    with socket.socket() as closed:
+        closed.bind(("127.0.0.1", 0))
+        port = closed.getsockname()[1]
+
+    async def main():
+        backend = RedisBackend(f"redis://127.0.0.1:{port}/0")
+        pages = PageCache(backend, "products", 60)
+        try:
+            assert await pages.key(version=1, page=1) is None
+            assert await pages.get("products:v0:digest") is None
+            await pages.set("products:v0:digest", b"page")
+            await pages.invalidate()
+        finally:
+            await backend.client.aclose()
+    asyncio.run(main())
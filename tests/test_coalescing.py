@@ -0,0 +1,62 @@
+"""
+Tests of the coalescing of identical product listing reads: identical requests missing the page cache at the
+same time share one query, and the counters report the queries actually run, not the pages served from the cache.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from test_query_counts import count_queries
+
+REQUESTS = 50
+
+
+def test_single_flight_collapses_identical_reads(client):
+    from app.config.coalescing import SingleFlight
+    flights, calls = SingleFlight("test", 8), []
+
+    async def read() -> str:
+        calls.append(None)
+        await asyncio.sleep(0.05)
+        return "page"
+
+    async def run() -> list:
+        return await asyncio.gather(*(flights.do("key", read) for _ in range(REQUESTS)))
+
+    assert asyncio.run(run()) == ["page"] * REQUESTS
+    assert len(calls) == 1
+    stats = flights.stats()
+    assert (stats["in_flight"], stats["reads"], stats["collapsed"]) == (0, 1, REQUESTS - 1)
+
+
+def test_concurrent_identical_searches_share_one_query(client, engines, admin_headers, monkeypatch):
+    from app.config import product_flights
+    from app.config.cache import cache_backend
+    from app.services import ProductService
+    category_id = client.post("/categories/", json={"name": "Phones"}, headers=admin_headers).json()["data"]["id"]
+    for i in range(3):
+        product = {"title": f"Wireless phone {i}", "description": "A phone.", "price": 100 + i,
+                   "discount_percentage": 10, "rating": 4.5, "stock": 10, "brand": "Acme",
+                   "thumbnail": "https://example.com/phone.jpg", "images": ["https://example.com/phone.jpg"],
+                   "is_published": True, "created_at": "2024-01-01T00:00:00Z", "category_id": category_id}
+        assert client.post("/products/", json=product, headers=admin_headers).status_code == 201
+    # Holds the query long enough for the requests let in by the session limits to arrive while it is in flight
+    query_products_page = ProductService.query_products_page
+
+    async def slow_query_products_page(*args, **kwargs) -> dict:
+        await asyncio.sleep(0.5)
+        return await query_products_page(*args, **kwargs)
+
+    monkeypatch.setattr(ProductService, "query_products_page", staticmethod(slow_query_products_page))
+    params = {"search": "wireless", "page": 1, "limit": 10}
+    page_hits = cache_backend.cache.hits
+    with count_queries(engines) as statements, ThreadPoolExecutor(max_workers=REQUESTS) as executor:
+        responses = list(executor.map(lambda _: client.get("/products/", params=params), range(REQUESTS)))
+    assert {response.status_code for response in responses} == {200}
+    assert len({response.content for response in responses}) == 1
+    assert len(responses[0].json()["data"]) == 3
+    product_queries = [statement for statement in statements if "FROM products" in statement]
+    stats = product_flights.stats()
+    # One query, the requests arriving during it joined it, the later ones were served from the page cache
+    assert len(product_queries) == stats["reads"] == 1
+    assert stats["collapsed"] > 0
+    assert stats["reads"] + stats["collapsed"] + cache_backend.cache.hits - page_hits == REQUESTS
@@ -0,0 +1,85 @@
+"""
+Tests of the conditional catalog GETs: the catalog versions are kept in process, so a page served from the
+cache issues no query at all, while a write of this worker changes the validators at once.
+"""
+
+from test_query_counts import count_queries
+
+
+def test_cached_page_issues_no_query(client, engines, admin_headers):
+    client.post("/categories/", json={"name": "Phones"}, headers=admin_headers)
+    first = client.get("/categories/", params={"limit": 10})
+    assert first.status_code == 200
+    with count_queries(engines) as statements:
+        again = client.get("/categories/", params={"limit": 10})
+        not_modified = client.get("/categories/", params={"limit": 10}, headers={"If-None-Match": first.headers["ETag"]})
+    assert again.status_code == 200 and again.content == first.content
+    assert not_modified.status_code == 304
+    assert statements == []
+
+
+def test_write_changes_validators(client, admin_headers):
+    client.post("/categories/", json={"name": "Phones"}, headers=admin_headers)
+    etag = client.get("/categories/", params={"limit": 10}).headers["ETag"]
+    client.post("/categories/", json={"name": "Laptops"}, headers=admin_headers)
+    response = client.get("/categories/", params={"limit": 10}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert [category["name"] for category in response.json()["data"]] == ["Phones", "Laptops"]
+
+
+def test_each_coding_has_its_own_strong_etag(client, admin_headers):
+    for i in range(40):
+        client.post("/categories/", json={"name": f"Category {i}"}, headers=admin_headers)
+    params = {"limit": 50}
+    identity = client.get("/categories/", params=params, headers={"Accept-Encoding": "identity"})
+    gzipped = client.get("/categories/", params=params, headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["Content-Encoding"] == "gzip" and "Content-Encoding" not in identity.headers
+    assert gzipped.headers["ETag"] == identity.headers["ETag"][:-1] + '-gzip"'
+    # Each client revalidates the coding it holds, and the 304 names it like the 200 did
+    for response, encoding in ((identity, "identity"), (gzipped, "gzip")):
+        not_modified = client.get("/categories/", params=params,
+                                  headers={"Accept-Encoding": encoding, "If-None-Match": response.headers["ETag"]})
+        assert not_modified.status_code == 304
+        assert not_modified.headers["ETag"] == response.headers["ETag"]
+        assert not_modified.headers["Vary"] == "Accept-Encoding"
+
+
+def test_write_of_another_worker_retires_cached_bodies(client, admin_headers):
+    from app.config import category_validators
+    from app.database.database import engine
+    from sqlalchemy import text
+    category_id = client.post("/categories/", json={"name": "Phones"}, headers=admin_headers).json()["data"]["id"]
+    paths = ["/categories/", f"/categories/{category_id}"]
+    cached = {path: client.get(path, params={"limit": 10}) for path in paths}
+    # Written outside this worker, which neither invalidates its caches nor forgets its version
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE categories SET name = 'Tablets'"))
+    for path in paths:
+        # Until the version kept in process expires, the cached body is served under its own ETag
+        response = client.get(path, params={"limit": 10})
+        assert (response.content, response.headers["ETag"]) == (cached[path].content, cached[path].headers["ETag"])
+    category_validators.forget()
+    for path in paths:
+        response = client.get(path, params={"limit": 10}, headers={"If-None-Match": cached[path].headers["ETag"]})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != cached[path].headers["ETag"]
+        assert b"Tablets" in response.content
+
+
+def test_write_of_another_worker_retires_memory_pages(client, admin_headers):
+    from app.config import product_validators
+    from app.database.database import engine
+    from sqlalchemy import text
+    category_id = client.post("/categories/", json={"name": "Phones"}, headers=admin_headers).json()["data"]["id"]
+    product = {"title": "Phone", "description": "A phone.", "price": 100, "discount_percentage": 10, "rating": 4.5,
+               "stock": 10, "brand": "Acme", "thumbnail": "https://example.com/phone.jpg",
+               "images": ["https://example.com/phone.jpg"], "is_published": True,
+               "created_at": "2024-01-01T00:00:00Z", "category_id": category_id}
+    client.post("/products/", json=product, headers=admin_headers)
+    assert b"Phone" in client.get("/products/", params={"limit": 10}).content
+    # Another worker's write bumps the shared version only, not the namespace version of this worker's memory
+    with engine.begin() as connection:
+        connection.execute(text("UPDATE products SET title = 'Tablet'"))
+    product_validators.forget()
+    assert b"Tablet" in client.get("/products/", params={"limit": 10}).content
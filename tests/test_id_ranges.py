@@ -0,0 +1,52 @@
+"""
+Tests of the id ranges allocated by the Postgres sequences: concurrent creates get unique ids in their
+table's range, and once a range is used up the next creates fail with a 409 without writing any row.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+REQUESTS = 200
+
+
+def create_concurrently(client, path: str, bodies: list, headers: dict) -> list:
+    "Sends every create at once, from as many threads, and returns the responses."
+    with ThreadPoolExecutor(max_workers=len(bodies)) as executor:
+        return list(executor.map(lambda body: client.post(path, json=body, headers=headers), bodies))
+
+
+def check_range(responses: list, first: int, last: int) -> list:
+    "Checks that the creates filled the range exactly, with unique ids, the others being rejected with a 409."
+    created = [response for response in responses if response.status_code == 201]
+    rejected = [response for response in responses if response.status_code != 201]
+    ids = [response.json()["data"]["id"] for response in created]
+    assert len(created) == last - first + 1
+    assert sorted(ids) == list(range(first, last + 1))
+    assert {response.status_code for response in rejected} == {409}
+    return ids
+
+
+def test_concurrent_category_creates(client, admin_headers):
+    responses = create_concurrently(client, "/categories/", [{"name": f"Category {i}"} for i in range(REQUESTS)],
+                                    admin_headers)
+    check_range(responses, 100, 199)
+    # The overflowing creates wrote nothing, and the range stays used up
+    categories = client.get("/categories/", params={"limit": 100}).json()
+    assert [category["id"] for category in categories["data"]] == list(range(100, 200))
+    assert client.get("/categories/", params={"limit": 100, "after": categories["next_cursor"]}).json()["data"] == []
+    assert client.post("/categories/", json={"name": "One more"}, headers=admin_headers).status_code == 409
+
+
+def test_concurrent_cart_creates(client, admin_headers):
+    category_id = client.post("/categories/", json={"name": "Phones"}, headers=admin_headers).json()["data"]["id"]
+    product = {"title": "Phone", "description": "A phone.", "price": 100, "discount_percentage": 10, "rating": 4.5,
+               "stock": 10, "brand": "Acme", "thumbnail": "https://example.com/phone.jpg",
+               "images": ["https://example.com/phone.jpg"], "is_published": True,
+               "created_at": "2024-01-01T00:00:00Z", "category_id": category_id}
+    product_id = client.post("/products/", json=product, headers=admin_headers).json()["data"]["id"]
+    responses = create_concurrently(client, "/carts/", [{"cart_items": [{"product_id": product_id, "quantity": 1}]}] * REQUESTS,
+                                    admin_headers)
+    ids = check_range(responses, 300, 399)
+    # Every cart was written with its item, the rejected ones left no item behind
+    carts = client.get("/carts/", params={"limit": 100}, headers=admin_headers).json()
+    assert sorted(cart["id"] for cart in carts["data"]) == sorted(ids)
+    assert all(len(cart["cart_items"]) == 1 for cart in carts["data"])
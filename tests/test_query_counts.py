@@ -0,0 +1,75 @@
+"""
+Tests of the number of queries of the cart and user reads: their relationships are loaded upfront in a constant
+number of queries, however many carts, items and products a page holds, so an N+1 cannot come back silently.
+"""
+
+import pytest
+from contextlib import contextmanager
+from sqlalchemy import event
+
+CARTS = 10
+ITEMS = 3
+
+
+@contextmanager
+def count_queries(engines: list):
+    "Counts the statements executed on `engines` within the block, in the yielded list."
+    statements = []
+    def record(connection, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+
+
+@pytest.fixture
+def carts(client, admin_headers) -> None:
+    "Fills `CARTS` carts of the admin with `ITEMS` items each, all of different products."
+    category_id = client.post("/categories/", json={"name": "Phones"}, headers=admin_headers).json()["data"]["id"]
+    product_ids = []
+    for i in range(CARTS * ITEMS):
+        product = {"title": f"Phone {i}", "description": "A phone.", "price": 100 + i, "discount_percentage": 10,
+                   "rating": 4.5, "stock": 10, "brand": "Acme", "thumbnail": "https://example.com/phone.jpg",
+                   "images": ["https://example.com/phone.jpg"], "is_published": True,
+                   "created_at": "2024-01-01T00:00:00Z", "category_id": category_id}
+        product_ids.append(client.post("/products/", json=product, headers=admin_headers).json()["data"]["id"])
+    for c in range(CARTS):
+        items = [{"product_id": product_id, "quantity": 1} for product_id in product_ids[c * ITEMS:(c + 1) * ITEMS]]
+        assert client.post("/carts/", json={"cart_items": items}, headers=admin_headers).status_code == 201
+
+
+def read_queries(client, engines: list, path: str, headers: dict, **params) -> int:
+    "Returns the number of queries of a read, with the product cache empty."
+    from app.config import product_cache
+    product_cache.clear()
+    with count_queries(engines) as statements:
+        response = client.get(path, params={name: value for name, value in params.items() if value is not None},
+                              headers=headers)
+    assert response.status_code == 200, response.text
+    # The catalog versions are read at most once per time to live, not once per read
+    return len([statement for statement in statements if "catalog_versions" not in statement])
+
+
+@pytest.mark.parametrize("expand, queries", [(None, 3), ("product", 2)])
+def test_carts_page_queries(client, engines, admin_headers, carts, expand, queries):
+    # Carts, then their items (joined to their products when expanded), then the side-loaded products
+    assert read_queries(client, engines, "/carts/", admin_headers, limit=1, expand=expand) == queries
+    assert read_queries(client, engines, "/carts/", admin_headers, limit=CARTS, expand=expand) == queries
+
+
+@pytest.mark.parametrize("expand, queries", [(None, 2), ("product", 1)])
+def test_cart_queries(client, engines, admin_headers, carts, expand, queries):
+    cart_id = client.get("/carts/", params={"limit": 1}, headers=admin_headers).json()["data"][0]["id"]
+    assert read_queries(client, engines, f"/carts/{cart_id}", admin_headers, expand=expand) == queries
+
+
+def test_user_queries(client, engines, admin_headers, user_headers, carts):
+    # The user, then their carts, then the carts' items joined to their products, if they have any carts
+    shopper_id = client.get("/me/", headers=user_headers).json()["data"]["id"]
+    admin_id = client.get("/me/", headers=admin_headers).json()["data"]["id"]
+    assert read_queries(client, engines, f"/users/{shopper_id}", admin_headers) == 2
+    assert read_queries(client, engines, f"/users/{admin_id}", admin_headers) == 3
@@ -0,0 +1,59 @@
+"""
+Tests of the revocation of refresh tokens: revocations are only kept, in memory and in the database,
+until their token expires.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone
+
+
+def insert_revocations(**expiries: datetime) -> None:
+    "Inserts a revocation in the table for each token ID of `expiries`, expiring at its value."
+    from app.database import RevokedToken
+    from app.database.database import engine
+    from sqlalchemy import insert
+    with engine.begin() as connection:
+        connection.execute(insert(RevokedToken), [{"jti": jti, "user_id": 1, "expires_at": expires_at}
+                                                  for jti, expires_at in expiries.items()])
+
+
+def stored_revocations() -> set:
+    from app.database import RevokedToken
+    from app.database.database import engine
+    from sqlalchemy import select
+    with engine.connect() as connection:
+        return set(connection.scalars(select(RevokedToken.jti)))
+
+
+def test_revocation_set_forgets_expired_tokens(client):
+    from app.config import RevocationSet
+    revoked = RevocationSet(3600)
+    now = time.time()
+    revoked.add("expired", now - 1)
+    revoked.add("live", now + 60)
+    assert "expired" not in revoked and "live" in revoked
+    assert len(revoked) == 1
+
+
+def test_load_skips_and_purges_expired_revocations(client, monkeypatch):
+    from app.config import RevocationSet, revocation
+    monkeypatch.setattr(revocation, "revoked_tokens", RevocationSet(3600))
+    now = datetime.now(timezone.utc)
+    insert_revocations(expired=now - timedelta(seconds=1), live=now + timedelta(minutes=1))
+    client.portal.call(revocation.load_revoked_tokens)
+    assert "live" in revocation.revoked_tokens and len(revocation.revoked_tokens) == 1
+    assert stored_revocations() == {"live"}
+
+
+def test_refresh_purges_expired_revocations(client, user_headers, monkeypatch):
+    from app.config import RevocationSet, revocation
+    tokens = client.post("/auth/login", data={"username": "shopper", "password": "password"}).json()
+    insert_revocations(expired=datetime.now(timezone.utc) - timedelta(seconds=1))
+    # The purge of the startup load is not due again yet, a fresh set is due at once
+    response = client.post("/auth/refresh", headers={"refresh-token": tokens["refresh_token"]})
+    assert response.status_code == 200, response.text
+    assert "expired" in stored_revocations()
+    monkeypatch.setattr(revocation, "revoked_tokens", RevocationSet(3600))
+    response = client.post("/auth/refresh", headers={"refresh-token": response.json()["refresh_token"]})
+    assert response.status_code == 200, response.text
+    assert "expired" not in stored_revocations() and len(stored_revocations()) == 2